@@ -0,0 +1,115 @@
+# library_index.py
+#
+# Copyright 2024 kramo
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+"""
+Compare the library index lookups with scanning the library,
+for libraries of several sizes.
+
+Run from the repository root with `python benchmarks/library_index.py`.
+"""
+
+import random
+import sys
+from pathlib import Path
+from timeit import timeit
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+# pylint: disable=wrong-import-position
+from cartridges.store.library_index import LibraryIndex
+from testing.fakes import FakeGame
+
+SIZES = (1_000, 10_000, 50_000)
+SOURCES = ("steam", "lutris", "heroic", "bottles", "itch", "legendary")
+
+
+class BenchmarkGame(FakeGame):
+    """A game whose flags are properties, like `cartridges.game.Game`"""
+
+    @property
+    def removed(self) -> bool:
+        return self._removed
+
+    @removed.setter
+    def removed(self, value: bool) -> None:
+        self._removed = value
+
+
+def count_sources(games: list[FakeGame]) -> tuple[dict[str, int], int]:
+    """Count the visible games of each source, like the sidebar used to"""
+    counts = dict.fromkeys(SOURCES, 0)
+    for game in games:
+        if not (game.removed or game.blacklisted or game.hidden):
+            counts[game.base_source] += 1
+    return counts, sum(counts.values())
+
+
+def run(n_games: int) -> None:
+    rng = random.Random(0)
+    games = [
+        BenchmarkGame(
+            f"{rng.choice(SOURCES)}_{number}",
+            removed=rng.random() < 0.2,
+            hidden=rng.random() < 0.1,
+        )
+        for number in range(n_games)
+    ]
+    index = LibraryIndex(("hidden", "removed", "blacklisted"))
+    for game in games:
+        index.add(game)
+    game_ids = [game.game_id for game in rng.sample(games, 100)]
+
+    cases = {
+        "ID lookup, scan": lambda: [
+            next(game for game in games if game.game_id == game_id)
+            for game_id in game_ids
+        ],
+        "ID lookup, index": lambda: [index.games[game_id] for game_id in game_ids],
+        "Not removed, scan": lambda: [game for game in games if not game.removed],
+        "Not removed, index": lambda: index.games_without_flag("removed"),
+        "Not removed of a source, scan": lambda: [
+            game for game in games if game.base_source == "steam" and not game.removed
+        ],
+        "Not removed of a source, index": lambda: index.games_without_flag(
+            "removed", "steam"
+        ),
+        "Sidebar counts, scan": lambda: count_sources(games),
+        "Sidebar counts, index": lambda: (
+            [index.get_source_count(source_id) for source_id in SOURCES],
+            index.get_total_count(),
+        ),
+    }
+
+    # Fewer runs for the bigger libraries, the scans take long
+    repeat = max(3, 100_000 // n_games)
+    print(f"{n_games} games, mean of {repeat} runs")
+    for name, case in cases.items():
+        seconds = timeit(case, number=repeat) / repeat
+        print(f"{name:32} {seconds * 1000:8.3f} ms")
+
+
+def main() -> None:
+    for index, n_games in enumerate(SIZES):
+        if index:
+            print()
+        run(n_games)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+# rate_limiter.py
+#
+# Copyright 2024 kramo
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+"""
+Measure the rate limiter with many threads waiting for a token.
+
+The threads all queue on an empty bucket, then the limiter runs on an
+injected clock: the waiter at the head of the queue moves the clock
+forward by its timeout instead of sleeping, so the run only costs the
+limiter's own work. Run from the repository root with
+`python benchmarks/rate_limiter.py`.
+"""
+
+import sys
+from pathlib import Path
+from threading import Condition, Thread
+from time import perf_counter, sleep
+from typing import Optional
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+# pylint: disable=wrong-import-position
+from cartridges.utils.rate_limiter import RateLimiter
+
+N_THREADS = 200
+START = 1000.0
+
+
+class InjectedClock:
+    """A clock that only moves when told to"""
+
+    def __init__(self, now: float) -> None:
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class BenchmarkRateLimiter(RateLimiter):
+    """A limiter whose timed waits move its clock instead of sleeping"""
+
+    refill_period_seconds = 10
+    refill_period_tokens = 1000
+    burst_tokens = 50
+
+    started: bool
+    n_wakeups: int
+    n_timed_waits: int
+
+    def __init__(self, clock: InjectedClock) -> None:
+        self.started = False
+        self.n_wakeups = 0
+        self.n_timed_waits = 0
+        super().__init__(clock, clock)
+
+    def wait(self, turn: Condition, timeout: Optional[float] = None) -> None:
+        if timeout is None or not self.started:
+            turn.wait()
+            self.n_wakeups += self.started
+            return
+        self.n_timed_waits += 1
+        # Like a real timeout, end a bit late so rounding can't leave a token short
+        self.clock.now += timeout + 1e-9
+
+    def start(self) -> None:
+        """Let the clock run, once the threads are queued"""
+        with self.lock:
+            self.started = True
+            self.queue[0].notify()
+
+
+def main() -> None:
+    clock = InjectedClock(START)
+    limiter = BenchmarkRateLimiter(clock)
+    for _token in range(limiter.burst_tokens):
+        limiter.acquire()
+
+    threads = [Thread(target=limiter.acquire) for _thread in range(N_THREADS)]
+    for thread in threads:
+        thread.start()
+    while len(limiter.queue) < N_THREADS:
+        sleep(0.001)
+
+    start = perf_counter()
+    limiter.start()
+    for thread in threads:
+        thread.join()
+    seconds = perf_counter() - start
+
+    simulated = clock.now - START
+    minimum = N_THREADS / limiter.refill_rate
+
+    print(f"{N_THREADS} threads waiting on an empty bucket")
+    print(f"{seconds * 1000:8.3f} ms in total")
+    print(f"{seconds / N_THREADS * 1_000_000:8.3f} µs per token")
+    print(f"{limiter.n_wakeups:8} wakeups, {limiter.n_timed_waits} timed waits")
+    print(f"{simulated:8.3f} s simulated, the minimum is {minimum:.3f} s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,181 @@
+# search_index.py
+#
+# Copyright 2024 kramo
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+"""
+Compare filtering the library on each keystroke of a search, before and after
+the search index.
+
+Before, the filter of every game lowercased the query and the game's fields,
+then scanned the whole library to pick the empty state notice, so a keystroke
+cost grew with the square of the library size. After, the filter compares the
+normalized query with the index keys, only the games the query change can
+affect are checked again, and the notice is picked once per pass.
+
+The keystrokes type a search then erase it. GTK isn't needed, its filter model
+is replaced by the rechecks it would do. Run from the repository root with
+`python benchmarks/search_index.py`.
+"""
+
+import random
+import string
+import sys
+from pathlib import Path
+from time import perf_counter
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+# pylint: disable=wrong-import-position
+from cartridges.store.search_index import SearchIndex, normalize
+from testing.fakes import FakeGame
+
+SIZES = (1_000, 2_000, 4_000)
+SOURCES = ("steam", "lutris", "heroic", "bottles", "itch", "legendary")
+SEARCH = "the witcher"
+
+
+def random_words(rng: random.Random, n_words: int) -> str:
+    return " ".join(
+        "".join(rng.choices(string.ascii_letters, k=rng.randint(2, 9))).title()
+        for _word in range(n_words)
+    )
+
+
+def set_library_child_before(games: list[FakeGame]) -> None:
+    """Pick the empty state notices by scanning the library, like before"""
+    child, hidden_child = True, True
+    for game in games:
+        if game.removed or game.blacklisted:
+            continue
+        if game.hidden:
+            if game.filtered and hidden_child:
+                continue
+            hidden_child = False
+        else:
+            if game.filtered and child:
+                continue
+            child = False
+
+
+def filter_before(games: list[FakeGame], text: str, source: str) -> int:
+    """Filter the library like the filter function before the index"""
+    n_shown = 0
+    for game in games:
+        # The query was read from the entry and lowercased for each game
+        query = text.lower()
+        filtered = query != "" and not (
+            query in game.name.lower()
+            or (query in game.developer.lower() if game.developer else False)
+        )
+        if not filtered and source != "all" and game.base_source != source:
+            filtered = True
+        game.filtered = filtered
+        set_library_child_before(games)
+        n_shown += not filtered
+    return n_shown
+
+
+class FilterAfter:
+    """Filter the library with the index, rechecking what GTK would recheck"""
+
+    def __init__(self, index: SearchIndex, games: list[FakeGame], source: str):
+        self.index = index
+        self.games = games
+        self.source = None if source == "all" else source
+        self.query = ""
+        self.shown = {
+            game.game_id
+            for game in games
+            if index.matches(game.game_id, self.query, self.source)
+        }
+
+    def search_changed(self, text: str) -> int:
+        query = normalize(text)
+        if query == self.query:
+            return len(self.shown)
+        previous_query, self.query = self.query, query
+
+        if query.startswith(previous_query):
+            # More strict, only the games shown can be filtered out
+            self.shown = {
+                game_id
+                for game_id in self.shown
+                if self.index.matches(game_id, query, self.source)
+            }
+        elif previous_query.startswith(query):
+            # Less strict, only the games filtered out can be shown
+            self.shown.update(
+                game.game_id
+                for game in self.games
+                if game.game_id not in self.shown
+                and self.index.matches(game.game_id, query, self.source)
+            )
+        else:
+            self.shown = {
+                game.game_id
+                for game in self.games
+                if self.index.matches(game.game_id, query, self.source)
+            }
+        return len(self.shown)
+
+
+def run(n_games: int, keystrokes: list[str]) -> None:
+    rng = random.Random(0)
+    games = [
+        FakeGame(
+            f"{rng.choice(SOURCES)}_{number}",
+            name=random_words(rng, rng.randint(1, 5)),
+            developer=random_words(rng, 2) if rng.random() < 0.7 else None,
+            hidden=rng.random() < 0.1,
+            filtered=False,
+        )
+        for number in range(n_games)
+    ]
+    index = SearchIndex()
+    for game in games:
+        index.update(game)
+
+    print(f"{n_games} games, {len(keystrokes)} keystrokes")
+    for source in ("all", "steam"):
+        start = perf_counter()
+        before = [filter_before(games, text, source) for text in keystrokes]
+        before_time = (perf_counter() - start) / len(keystrokes)
+
+        start = perf_counter()
+        filter_after = FilterAfter(index, games, source)
+        after = [filter_after.search_changed(text) for text in keystrokes]
+        after_time = (perf_counter() - start) / len(keystrokes)
+
+        assert before == after
+        print(
+            f"Source {source:6} before {before_time * 1000:9.3f} ms, "
+            f"after {after_time * 1000:7.3f} ms per keystroke"
+        )
+
+
+def main() -> None:
+    typed = [SEARCH[:length] for length in range(1, len(SEARCH) + 1)]
+    keystrokes = typed + typed[-2::-1] + [""]
+    for index, n_games in enumerate(SIZES):
+        if index:
+            print()
+        run(n_games, keystrokes)
+
+
+if __name__ == "__main__":
+    main()
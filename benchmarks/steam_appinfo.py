@@ -0,0 +1,78 @@
+# steam_appinfo.py
+#
+# Copyright 2024 kramo
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+"""
+Measure reading the metadata of installed Steam games from appinfo.vdf.
+
+A synthetic appinfo.vdf with a few thousand apps is written to a temporary
+directory, then the installed games are looked up in it like the Steam
+source does, without any network access. Run from the repository root
+with `python benchmarks/steam_appinfo.py`.
+"""
+
+import random
+import sys
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from timeit import timeit
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+# pylint: disable=wrong-import-position
+from cartridges.utils.steam_appinfo import SteamAppInfoHelper
+from testing.steam_appinfo import app, write_appinfo
+
+N_APPS = 5000
+N_INSTALLED = (10, 100, 1000)
+TYPES = ("game", "game", "game", "dlc", "tool", "demo", "music")
+REPEAT = 10
+
+
+def main() -> None:
+    rng = random.Random(0)
+    apps = {
+        appid: app(
+            rng.choice(TYPES),
+            f"App {appid}",
+            tuple(f"Studio {rng.randrange(500)}" for _dev in range(rng.randint(0, 2))),
+            oslist="windows,linux",
+            metacritic_score=rng.randrange(100),
+        )
+        for appid in rng.sample(range(10, 3_000_000), N_APPS)
+    }
+
+    with TemporaryDirectory() as directory:
+        for version in (28, 29):
+            path = write_appinfo(Path(directory) / "appinfo.vdf", version, apps)
+            size = path.stat().st_size / 1024 / 1024
+            print(f"v{version}, {N_APPS} apps, {size:.1f} MiB, mean of {REPEAT} runs")
+            for n_installed in N_INSTALLED:
+                appids = [str(appid) for appid in rng.sample(list(apps), n_installed)]
+                seconds = (
+                    timeit(
+                        lambda: SteamAppInfoHelper().get_appinfo_data(path, appids),
+                        number=REPEAT,
+                    )
+                    / REPEAT
+                )
+                print(f"{n_installed:6} installed {seconds * 1000:8.3f} ms")
+
+
+if __name__ == "__main__":
+    main()
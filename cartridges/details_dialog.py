@@ -190,7 +190,7 @@ class DetailsDialog(Adw.Dialog):
             source_id = "imported"
             numbers = [0]
             game_id: str
-            for game_id in shared.store.source_games.get(source_id, set()):
+            for game_id in tuple(shared.store.source_games.get(source_id, ())):
                 prefix = "imported_"
                 if not game_id.startswith(prefix):
                     continue
@@ -238,6 +238,7 @@ class DetailsDialog(Adw.Dialog):
             shared.win.game_covers[self.game.game_id].animation = None
 
         shared.win.game_covers[self.game.game_id] = self.game_cover
+        self.game.mark_dirty("cover")
 
         if self.cover_changed:
             save_cover(
@@ -20,96 +20,198 @@
 import shlex
 from pathlib import Path
 from time import time
-from typing import Any, Optional
-
-from gi.repository import Adw, GObject, Gtk
+from typing import Any, Callable, Optional
 
 from cartridges import shared
-from cartridges.game_cover import GameCover
 from cartridges.utils.run_executable import run_executable
 
 
 # pylint: disable=too-many-instance-attributes
-@Gtk.Template(resource_path=shared.PREFIX + "/gtk/game.ui")
-class Game(Gtk.Box):
-    __gtype_name__ = "Game"
-
-    title = Gtk.Template.Child()
-    play_button = Gtk.Template.Child()
-    cover = Gtk.Template.Child()
-    spinner = Gtk.Template.Child()
-    cover_button = Gtk.Template.Child()
-    menu_button = Gtk.Template.Child()
-    play_revealer = Gtk.Template.Child()
-    menu_revealer = Gtk.Template.Child()
-    game_options = Gtk.Template.Child()
-    hidden_game_options = Gtk.Template.Child()
-
-    loading: int = 0
-    filtered: bool = False
+class Game:
+    """
+    A game of the library.
+
+    Plain data record, a widget is only bound while the game is on screen.
+    """
+
+    __slots__ = (
+        "added",
+        "executable",
+        "game_id",
+        "source",
+        "base_source",
+        "last_played",
+        "developer",
+        "version",
+        "_name",
+        "_sort_name",
+        "_hidden",
+        "_removed",
+        "_blacklisted",
+        "loading",
+        "game_cover",
+        "widget",
+        "handlers",
+        "dirty",
+    )
 
     added: int
     executable: str
     game_id: str
     source: str
-    hidden: bool = False
-    last_played: int = 0
-    name: str
-    developer: Optional[str] = None
-    removed: bool = False
-    blacklisted: bool = False
-    game_cover: GameCover = None
-    version: int = 0
-
-    def __init__(self, data: dict[str, Any], **kwargs: Any) -> None:
-        super().__init__(**kwargs)
-
-        self.app = shared.win.get_application()
+    base_source: str
+    last_played: int
+    developer: Optional[str]
+    version: float
+
+    # Attributes stored in game_id.json
+    data_attrs = (
+        "added",
+        "executable",
+        "game_id",
+        "source",
+        "hidden",
+        "last_played",
+        "name",
+        "developer",
+        "removed",
+        "blacklisted",
+        "version",
+    )
+
+    # Attributes whose changes are tracked to update the game's display
+    tracked_attrs = frozenset(
+        (
+            "name",
+            "developer",
+            "added",
+            "last_played",
+            "hidden",
+            "removed",
+            "blacklisted",
+        )
+    )
+
+    loading: int
+    game_cover: Any  # Optional[GameCover]
+    widget: Any  # Optional[GameWidget]
+    handlers: dict[str, list[Callable[..., Any]]]
+    dirty: set[str]
+
+    def __init__(self, data: dict[str, Any]) -> None:
+        self.dirty = set()
+        self.handlers = {}
+        self.widget = None
+        self.game_cover = None
+        self.loading = 0
+        self._sort_name = None
+
+        self.added = 0
+        self.executable = ""
+        self.game_id = ""
+        self.source = ""
+        self.last_played = 0
+        self.name = ""
+        self.developer = None
+        self._hidden = False
+        self._removed = False
+        self._blacklisted = False
         self.version = shared.SPEC_VERSION
 
         self.update_values(data)
         self.base_source = self.source.split("_")[0]
-
-        self.set_play_icon()
-
-        self.event_contoller_motion = Gtk.EventControllerMotion.new()
-        self.add_controller(self.event_contoller_motion)
-        self.event_contoller_motion.connect("enter", self.toggle_play, False)
-        self.event_contoller_motion.connect("leave", self.toggle_play, None, None)
-        self.cover_button.connect("clicked", self.main_button_clicked, False)
-        self.play_button.connect("clicked", self.main_button_clicked, True)
-
-        shared.schema.connect("changed", self.schema_changed)
+        self.dirty.clear()
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        if name in self.tracked_attrs and getattr(self, name, None) != value:
+            self.dirty.add(name)
+        super().__setattr__(name, value)
+
+    def mark_dirty(self, *names: str) -> None:
+        """Flag parts of the game that changed outside of its tracked attributes"""
+        self.dirty.update(names)
+
+    def take_dirty(self) -> set[str]:
+        """Get the names of what changed since the last call"""
+        dirty, self.dirty = self.dirty, set()
+        return dirty
+
+    @property
+    def name(self) -> str:
+        return self._name
+
+    @name.setter
+    def name(self, value: str) -> None:
+        self._name = value
+        self._sort_name = None
+
+    @property
+    def sort_name(self) -> str:
+        """Key to sort games by name, computed once per name change"""
+        if self._sort_name is None:
+            self._sort_name = self._name.lower().removeprefix("the ")
+        return self._sort_name
+
+    @property
+    def hidden(self) -> bool:
+        return self._hidden
+
+    @hidden.setter
+    def hidden(self, value: bool) -> None:
+        self._hidden = value
+        self.flags_changed()
+
+    @property
+    def removed(self) -> bool:
+        return self._removed
+
+    @removed.setter
+    def removed(self, value: bool) -> None:
+        self._removed = value
+        self.flags_changed()
+
+    @property
+    def blacklisted(self) -> bool:
+        return self._blacklisted
+
+    @blacklisted.setter
+    def blacklisted(self, value: bool) -> None:
+        self._blacklisted = value
+        self.flags_changed()
+
+    def flags_changed(self) -> None:
+        """Keep the store's flag indexes in sync with the game"""
+        if shared.store is not None:
+            shared.store.update_flag_indexes(self)
+
+    def connect(self, signal: str, callback: Callable[..., Any]) -> None:
+        """Call back on a signal, with the game and the signal arguments"""
+        self.handlers.setdefault(signal, []).append(callback)
+
+    def emit(self, signal: str, *args: Any) -> None:
+        for callback in self.handlers.get(signal, ()):
+            callback(self, *args)
 
     def update_values(self, data: dict[str, Any]) -> None:
         for key, value in data.items():
+            # Skip unknown keys, eg. from older versions of the spec
+            if key not in self.data_attrs:
+                continue
             # Convert executables to strings
             if key == "executable" and isinstance(value, list):
                 value = shlex.join(value)
             setattr(self, key, value)
 
     def update(self) -> None:
+        """Signal that the game needs updating"""
         self.emit("update-ready", {})
 
     def save(self) -> None:
+        """Signal that the game needs saving"""
         self.emit("save-ready", {})
 
     def create_toast(self, title: str, action: Optional[str] = None) -> None:
-        toast = Adw.Toast.new(title.format(self.name))
-        toast.set_priority(Adw.ToastPriority.HIGH)
-        toast.set_use_markup(False)
-
-        if action:
-            toast.set_button_label(_("Undo"))
-            toast.connect("button-clicked", shared.win.on_undo_action, self, action)
-
-            if (self, action) in shared.win.toasts.keys():
-                # Dismiss the toast if there already is one
-                shared.win.toasts[(self, action)].dismiss()
-
-            shared.win.toasts[(self, action)] = toast
-
-        shared.win.toast_overlay.add_toast(toast)
+        shared.win.create_game_toast(self, title, action)
 
     def launch(self) -> None:
         self.last_played = int(time())
@@ -119,7 +221,7 @@ class Game(Gtk.Box):
         run_executable(self.executable)
 
         if shared.schema.get_boolean("exit-after-launch"):
-            self.app.quit()
+            shared.win.get_application().quit()
 
         # The variable is the title of the game
         self.create_toast(_("{} launched"))
@@ -154,10 +256,8 @@ class Game(Gtk.Box):
 
     def set_loading(self, state: int) -> None:
         self.loading += state
-        loading = self.loading > 0
-
-        self.cover.set_opacity(int(not loading))
-        self.spinner.set_visible(loading)
+        if self.widget:
+            self.widget.set_loading(self.loading > 0)
 
     def get_cover_path(self) -> Optional[Path]:
         cover_path = shared.covers_dir / f"{self.game_id}.gif"
@@ -169,35 +269,3 @@ class Game(Gtk.Box):
             return cover_path  # type: ignore
 
         return None
-
-    def toggle_play(
-        self, _widget: Any, _prop1: Any, _prop2: Any, state: bool = True
-    ) -> None:
-        if not self.menu_button.get_active():
-            self.play_revealer.set_reveal_child(not state)
-            self.menu_revealer.set_reveal_child(not state)
-
-    def main_button_clicked(self, _widget: Any, button: bool) -> None:
-        if shared.schema.get_boolean("cover-launches-game") ^ button:
-            self.launch()
-        else:
-            shared.win.show_details_page(self)
-
-    def set_play_icon(self) -> None:
-        self.play_button.set_icon_name(
-            "help-about-symbolic"
-            if shared.schema.get_boolean("cover-launches-game")
-            else "media-playback-start-symbolic"
-        )
-
-    def schema_changed(self, _settings: Any, key: str) -> None:
-        if key == "cover-launches-game":
-            self.set_play_icon()
-
-    @GObject.Signal(name="update-ready", arg_types=[object])
-    def update_ready(self, _additional_data):  # type: ignore
-        """Signal emitted when the game needs updating"""
-
-    @GObject.Signal(name="save-ready", arg_types=[object])
-    def save_ready(self, _additional_data):  # type: ignore
-        """Signal emitted when the game needs saving"""
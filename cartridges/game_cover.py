@@ -46,7 +46,9 @@ class GameCover:
         self.pictures = pictures
         self.new_cover(path)
 
-    def new_cover(self, path: Optional[Path] = None) -> None:
+    def new_cover(
+        self, path: Optional[Path] = None, texture: Optional[Gdk.Texture] = None
+    ) -> None:
         self.animation = None
         self.texture = None
         self.blurred = None
@@ -62,7 +64,7 @@ class GameCover:
                     lambda *_: self.update_animation((self.task, self.animation))
                 )
             else:
-                self.texture = Gdk.Texture.new_from_filename(str(path))
+                self.texture = texture or Gdk.Texture.new_from_filename(str(path))
 
         if not self.animation:
             self.set_texture(self.texture)
@@ -105,10 +107,13 @@ class GameCover:
 
     def add_picture(self, picture: Gtk.Picture) -> None:
         self.pictures.add(picture)
-        if not self.animation:
-            self.set_texture(self.texture)
-        else:
+        if self.animation:
             self.update_animation((self.task, self.animation))
+        elif self.path and self.path.suffix == ".gif":
+            # Animations stop while no picture shows them
+            self.new_cover(self.path)
+        else:
+            self.set_texture(self.texture)
 
     def set_texture(self, texture: Gdk.Texture) -> None:
         self.pictures.discard(
@@ -0,0 +1,144 @@
+# game_widget.py
+#
+# Copyright 2022-2024 kramo
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+from typing import Any, Optional
+
+from gi.repository import GObject, Gtk
+
+from cartridges import shared
+from cartridges.game import Game
+
+
+class GameItem(GObject.Object):
+    """Item of the library list models, holding a displayed game"""
+
+    __gtype_name__ = "GameItem"
+
+    game: Game
+
+    def __init__(self, game: Game) -> None:
+        super().__init__()
+        self.game = game
+
+
+@Gtk.Template(resource_path=shared.PREFIX + "/gtk/game.ui")
+class GameWidget(Gtk.Box):
+    """
+    Library card of a displayed game.
+
+    Cards are recycled by the library grid views,
+    a card is bound to the game it shows while it is visible.
+    """
+
+    __gtype_name__ = "GameWidget"
+
+    title = Gtk.Template.Child()
+    play_button = Gtk.Template.Child()
+    cover = Gtk.Template.Child()
+    spinner = Gtk.Template.Child()
+    cover_button = Gtk.Template.Child()
+    menu_button = Gtk.Template.Child()
+    play_revealer = Gtk.Template.Child()
+    menu_revealer = Gtk.Template.Child()
+    game_options = Gtk.Template.Child()
+    hidden_game_options = Gtk.Template.Child()
+
+    game: Optional[Game] = None
+
+    def __init__(self, **kwargs: Any) -> None:
+        super().__init__(**kwargs)
+
+        self.set_play_icon()
+
+        self.event_contoller_motion = Gtk.EventControllerMotion.new()
+        self.add_controller(self.event_contoller_motion)
+        self.event_contoller_motion.connect("enter", self.toggle_play, False)
+        self.event_contoller_motion.connect("leave", self.toggle_play, None, None)
+        self.cover_button.connect("clicked", self.main_button_clicked, False)
+        self.play_button.connect("clicked", self.main_button_clicked, True)
+        self.menu_button.get_popover().connect(
+            "notify::visible", self.toggle_play, None
+        )
+        self.menu_button.get_popover().connect("notify::visible", self.popover_visible)
+
+        shared.schema.connect("changed", self.schema_changed)
+
+    def bind(self, game: Game) -> None:
+        """Show a game in the card"""
+        self.game = game
+        game.widget = self
+        self.refresh()
+
+    def refresh(self) -> None:
+        """Show the changes of the bound game"""
+        if not (game := self.game):
+            return
+
+        self.title.set_label(game.name)
+        self.menu_button.set_menu_model(
+            self.hidden_game_options if game.hidden else self.game_options
+        )
+        self.set_loading(game.loading > 0)
+        shared.win.add_game_cover(game, self.cover)
+
+    def unbind(self) -> None:
+        """Release the game shown in the card"""
+        if not (game := self.game):
+            return
+
+        if game.widget is self:
+            game.widget = None
+        if game.game_cover:
+            shared.win.release_game_cover(game.game_id, game.game_cover, self.cover)
+        self.game = None
+
+    def set_loading(self, loading: bool) -> None:
+        self.cover.set_opacity(int(not loading))
+        self.spinner.set_visible(loading)
+
+    def toggle_play(
+        self, _widget: Any, _prop1: Any, _prop2: Any, state: bool = True
+    ) -> None:
+        if not self.menu_button.get_active():
+            self.play_revealer.set_reveal_child(not state)
+            self.menu_revealer.set_reveal_child(not state)
+
+    def popover_visible(self, *_args: Any) -> None:
+        if self.game:
+            shared.win.set_active_game(None, None, self.game)
+
+    def main_button_clicked(self, _widget: Any, button: bool) -> None:
+        if not self.game:
+            return
+
+        if shared.schema.get_boolean("cover-launches-game") ^ button:
+            self.game.launch()
+        else:
+            shared.win.show_details_page(self.game)
+
+    def set_play_icon(self) -> None:
+        self.play_button.set_icon_name(
+            "help-about-symbolic"
+            if shared.schema.get_boolean("cover-launches-game")
+            else "media-playback-start-symbolic"
+        )
+
+    def schema_changed(self, _settings: Any, key: str) -> None:
+        if key == "cover-launches-game":
+            self.set_play_icon()
@@ -19,6 +19,7 @@
 # SPDX-License-Identifier: GPL-3.0-or-later
 
 import logging
+from threading import Lock
 from time import time
 from typing import Any, Optional
 
@@ -31,7 +32,10 @@ from cartridges.game import Game
 from cartridges.importer.location import UnresolvableLocationError
 from cartridges.importer.source import Source
 from cartridges.store.managers.async_manager import AsyncManager
+from cartridges.store.managers.file_manager import FileManager
 from cartridges.store.pipeline import Pipeline
+from cartridges.utils.frame_timer import FrameTimer
+from cartridges.utils.http_client import http_client
 
 
 # pylint: disable=too-many-instance-attributes
@@ -47,13 +51,18 @@ class Importer(ErrorProducer):
 
     n_source_tasks_created: int = 0
     n_source_tasks_done: int = 0
+    # Counted from the source threads, before their task is done
+    n_pipelines: int = 0
     n_pipelines_done: int = 0
+    n_pipelines_lock: Lock
+    # Pipelines still running, done ones are released
     game_pipelines: set[Pipeline]
 
     removed_game_ids: set[str]
     imported_game_ids: set[str]
 
     close_attempt_id: int
+    frame_timer: FrameTimer
 
     def __init__(self) -> None:
         super().__init__()
@@ -68,20 +77,26 @@ class Importer(ErrorProducer):
         self.imported_game_ids = set()
 
         self.game_pipelines = set()
+        self.n_pipelines_lock = Lock()
         self.sources = set()
+        self.frame_timer = FrameTimer(shared.win)
 
     @property
     def n_games_added(self) -> int:
         return sum(
-            1 if not (pipeline.game.blacklisted or pipeline.game.removed) else 0
-            for pipeline in self.game_pipelines
+            1
+            for game_id in self.imported_game_ids
+            if (game := shared.store.get(game_id))
+            and not (game.blacklisted or game.removed)
         )
 
     @property
     def pipelines_progress(self) -> float:
-        progress = sum(pipeline.progress for pipeline in self.game_pipelines)
+        progress = self.n_pipelines_done + sum(
+            pipeline.progress for pipeline in self.game_pipelines
+        )
         try:
-            progress = progress / len(self.game_pipelines)
+            progress = progress / self.n_pipelines
         except ZeroDivisionError:
             progress = 0
         return progress  # type: ignore
@@ -98,7 +113,7 @@ class Importer(ErrorProducer):
     def finished(self) -> bool:
         return (
             self.n_source_tasks_created == self.n_source_tasks_done
-            and len(self.game_pipelines) == self.n_pipelines_done
+            and self.n_pipelines == self.n_pipelines_done
         )
 
     def add_source(self, source: Source) -> None:
@@ -115,10 +130,12 @@ class Importer(ErrorProducer):
         shared.win.get_application().lookup_action("add_game").set_enabled(False)
         shared.win.get_application().lookup_action("preferences").set_enabled(False)
 
+        self.n_pipelines = 0
         self.n_pipelines_done = 0
         self.n_source_tasks_done = 0
 
         self.create_dialog()
+        self.frame_timer.start()
         GLib.timeout_add(100, self.monitor_import)
         GLib.timeout_add(100, self.__watchdog)
 
@@ -128,19 +145,20 @@ class Importer(ErrorProducer):
         self.collect_errors()
         for manager in shared.store.managers.values():
             manager.collect_errors()
+            manager.reset_metrics()
             if isinstance(manager, AsyncManager):
                 manager.reset_cancellable()
+                manager.worker_pool.reset_stats()
+        http_client.reset_stats()
 
         for source in self.sources:
             logging.debug("Importing games from source %s", source.source_id)
             task = Gio.Task.new(None, None, self.source_callback, (source,))
             self.n_source_tasks_created += 1
             task.run_in_thread(
-                lambda _task,
-                _obj,
-                _data,
-                _cancellable,
-                src=source: self.source_task_thread_func((src,))
+                lambda _task, _obj, _data, _cancellable, src=source: self.source_task_thread_func(
+                    (src,)
+                )
             )
 
     # Workaround: Adw bug: Dialog won't close if closed too soon after opening
@@ -159,12 +177,18 @@ class Importer(ErrorProducer):
             self.update_progressbar()
             return True
 
-        self.finish_import()
+        # Wait for the imported games to be written before finishing
+        shared.store.managers[FileManager].flush(self.finish_import)
         return False
 
     def finish_import(self) -> None:
         """Callback called when importing has finished"""
         logging.info("Import done")
+        self.frame_timer.stop("Import frame times")
+        for manager in shared.store.managers.values():
+            if isinstance(manager, AsyncManager):
+                manager.log_worker_stats()
+        http_client.log_stats()
         self.remove_games()
         self.imported_game_ids = shared.store.new_game_ids
         shared.store.new_game_ids = set()
@@ -179,7 +203,7 @@ class Importer(ErrorProducer):
         shared.win.get_application().lookup_action("add_game").set_enabled(True)
         shared.win.get_application().lookup_action("preferences").set_enabled(True)
         shared.win.get_application().state = shared.AppState.DEFAULT
-        shared.win.create_source_rows()
+        shared.win.queue_source_rows_update()
 
     def remove_games(self) -> None:
         """Set removed to True for missing games"""
@@ -188,26 +212,24 @@ class Importer(ErrorProducer):
 
         keys = shared.schema.list_keys()
 
-        for game in shared.store:
-            if game.removed:
-                continue
-            if game.source == "imported":
+        for source_id in tuple(shared.store.source_games):
+            if source_id == "imported":
                 continue
-            if (game.base_source in keys) and (
-                not shared.schema.get_boolean(game.base_source)
-            ):
-                continue
-            if game.game_id in shared.store.duplicate_game_ids:
-                continue
-            if game.game_id in shared.store.new_game_ids:
+            if (source_id in keys) and (not shared.schema.get_boolean(source_id)):
                 continue
 
-            logging.debug("Removing missing game %s (%s)", game.name, game.game_id)
+            for game in shared.store.games_without_flag("removed", source_id):
+                if game.game_id in shared.store.duplicate_game_ids:
+                    continue
+                if game.game_id in shared.store.new_game_ids:
+                    continue
+
+                logging.debug("Removing missing game %s (%s)", game.name, game.game_id)
 
-            game.removed = True
-            game.save()
-            game.update()
-            self.removed_game_ids.add(game.game_id)
+                game.removed = True
+                game.save()
+                game.update()
+                self.removed_game_ids.add(game.game_id)
 
     """Import Actions — Threaded; None of this should touch GUI"""
 
@@ -262,11 +284,13 @@ class Importer(ErrorProducer):
             pipeline: Pipeline = shared.store.add_game(game, additional_data)
             if pipeline is not None:
                 logging.info("Imported %s (%s)", game.name, game.game_id)
-                pipeline.connect(
-                    "advanced",
-                    self.pipeline_advanced_callback,
+                shared.store.enrichment_queue.add(game, additional_data)
+                # Count it now, so the import can't finish before it is followed
+                with self.n_pipelines_lock:
+                    self.n_pipelines += 1
+                GLib.idle_add(
+                    self.add_pipeline, pipeline, priority=GLib.PRIORITY_DEFAULT
                 )
-                self.game_pipelines.add(pipeline)
 
     def source_callback(self, _obj: Any, _result: Any, data: tuple) -> None:
         """Callback executed when a source is fully scanned"""
@@ -274,9 +298,16 @@ class Importer(ErrorProducer):
         logging.debug("Import done for source %s", source.source_id)
         self.n_source_tasks_done += 1
 
+    def add_pipeline(self, pipeline: Pipeline) -> None:
+        """Follow the pipeline of an imported game, from the main loop"""
+        self.game_pipelines.add(pipeline)
+        pipeline.connect("advanced", self.pipeline_advanced_callback)
+        self.pipeline_advanced_callback(pipeline)
+
     def pipeline_advanced_callback(self, pipeline: Pipeline) -> None:
         """Callback called when a pipeline for a game has advanced"""
-        if pipeline.is_done:
+        if pipeline.is_done and pipeline in self.game_pipelines:
+            self.game_pipelines.remove(pipeline)
             self.n_pipelines_done += 1
 
     """GUI Actions"""
@@ -359,6 +390,8 @@ class Importer(ErrorProducer):
         dialog.present(shared.win)
 
     def undo_import(self, *_args: Any) -> None:
+        shared.store.enrichment_queue.drop(self.imported_game_ids)
+
         for game_id in self.imported_game_ids:
             shared.store[game_id].removed = True
             shared.store[game_id].update()
@@ -21,13 +21,24 @@
 import logging
 import re
 from pathlib import Path
+from time import perf_counter
 from typing import Iterable, NamedTuple
 
 from cartridges import shared
 from cartridges.game import Game
 from cartridges.importer.location import Location, LocationSubPath
 from cartridges.importer.source import SourceIterable, URLExecutableSource
-from cartridges.utils.steam import SteamFileHelper, SteamInvalidManifestError
+from cartridges.utils.steam import (
+    SteamFileHelper,
+    SteamInvalidManifestError,
+    SteamManifestData,
+)
+from cartridges.utils.steam_appinfo import (
+    STEAM_GAME_TYPES,
+    SteamAppInfoData,
+    SteamAppInfoHelper,
+    SteamInvalidAppInfoError,
+)
 
 
 class SteamSourceIterable(SourceIterable):
@@ -58,10 +69,27 @@ class SteamSourceIterable(SourceIterable):
             )
         return manifests
 
+    def get_appinfo_data(self, appids: Iterable[str]) -> dict[str, SteamAppInfoData]:
+        """Get the data Steam caches locally for apps, in appcache/appinfo.vdf"""
+        appinfo_path = self.source.locations.data["librarycache"].parent / "appinfo.vdf"
+        start = perf_counter()
+        try:
+            appinfo_data = SteamAppInfoHelper().get_appinfo_data(appinfo_path, appids)
+        except (OSError, SteamInvalidAppInfoError) as error:
+            logging.debug("Couldn't read %s", appinfo_path, exc_info=error)
+            return {}
+        logging.debug(
+            "Read %d apps from appinfo.vdf in %d ms",
+            len(appinfo_data),
+            (perf_counter() - start) * 1000,
+        )
+        return appinfo_data
+
     def __iter__(self):
         """Generator method producing games"""
         appid_cache = set()
         manifests = self.get_manifests()
+        installed: list[SteamManifestData] = []
 
         for manifest in manifests:
             # Get metadata from manifest
@@ -84,6 +112,14 @@ class SteamSourceIterable(SourceIterable):
                 logging.debug("Skipped %s: appid already seen during import", manifest)
                 continue
             appid_cache.add(appid)
+            installed.append(local_data)
+
+        # Read the metadata of all the installed apps in one pass,
+        # the Steam API is only asked for the apps missing from it
+        appinfo_data = self.get_appinfo_data(appid_cache)
+
+        for local_data in installed:
+            appid = local_data["appid"]
 
             # Build game from local data
             values = {
@@ -93,6 +129,16 @@ class SteamSourceIterable(SourceIterable):
                 "game_id": self.source.game_id_format.format(game_id=appid),
                 "executable": self.source.make_executable(game_id=appid),
             }
+
+            # Use the local metadata if Steam has it, else ask the Steam API
+            fetch_api_data = True
+            if app_info := appinfo_data.get(appid):
+                if app_info["type"] not in STEAM_GAME_TYPES:
+                    values["blacklisted"] = True
+                    fetch_api_data = False
+                elif app_info["developer"]:
+                    values["developer"] = app_info["developer"]
+                    fetch_api_data = False
             game = Game(values)
 
             # Add official cover image
@@ -101,7 +147,9 @@ class SteamSourceIterable(SourceIterable):
                 / appid
                 / "library_600x900.jpg"
             )
-            additional_data = {"local_image_path": image_path, "steam_appid": appid}
+            additional_data = {"local_image_path": image_path}
+            if fetch_api_data:
+                additional_data["steam_appid"] = appid
 
             yield (game, additional_data)
 
@@ -18,11 +18,14 @@
 # SPDX-License-Identifier: GPL-3.0-or-later
 
 import json
+import logging
 import lzma
 import shlex
+import sqlite3
 import sys
-from time import time
-from typing import Any, Optional
+from itertools import islice
+from time import perf_counter, time
+from typing import Any, Callable, Optional
 from urllib.parse import quote
 
 import gi
@@ -48,13 +51,20 @@ from cartridges.importer.retroarch_source import RetroarchSource
 from cartridges.importer.steam_source import SteamSource
 from cartridges.logging.setup import log_system_info, setup_logging
 from cartridges.preferences import CartridgesPreferences
+from cartridges.store.database import (
+    get_library_database,
+    load_game_records,
+    sync_library_storage,
+)
 from cartridges.store.managers.cover_manager import CoverManager
 from cartridges.store.managers.display_manager import DisplayManager
 from cartridges.store.managers.file_manager import FileManager
+from cartridges.store.managers.online_cover_manager import OnlineCoverManager
 from cartridges.store.managers.sgdb_manager import SgdbManager
 from cartridges.store.managers.steam_api_manager import SteamAPIManager
 from cartridges.store.store import Store
 from cartridges.utils.run_executable import run_executable
+from cartridges.utils.write_atomically import write_atomically
 from cartridges.window import CartridgesWindow
 
 
@@ -93,6 +103,8 @@ class CartridgesApplication(Adw.Application):
 
     def do_activate(self) -> None:  # pylint: disable=arguments-differ
         """Called on app creation"""
+        activate_time = perf_counter()
+
         try:
             setup_logging()
         except ValueError:
@@ -116,19 +128,15 @@ class CartridgesApplication(Adw.Application):
             "is-maximized", shared.win, "maximized", Gio.SettingsBindFlags.DEFAULT
         )
 
-        # Load games from disk
+        # Only display the games loaded from disk,
+        # the rest of the managers join the pipelines once loading is done.
+        # Online data is fetched in the background after imports.
         shared.store.add_manager(FileManager(), False)
         shared.store.add_manager(DisplayManager())
-        self.state = shared.AppState.LOAD_FROM_DISK
-        self.load_games_from_disk()
-        self.state = shared.AppState.DEFAULT
-        shared.win.create_source_rows()
-
-        # Add rest of the managers for game imports
-        shared.store.add_manager(CoverManager())
-        shared.store.add_manager(SteamAPIManager())
-        shared.store.add_manager(SgdbManager())
-        shared.store.toggle_manager_in_pipelines(FileManager, True)
+        shared.store.add_manager(CoverManager(), False)
+        shared.store.add_manager(SteamAPIManager(), False, True)
+        shared.store.add_manager(OnlineCoverManager(), False, True)
+        shared.store.add_manager(SgdbManager(), False, True)
 
         # Create actions
         self.create_actions(
@@ -175,20 +183,57 @@ class CartridgesApplication(Adw.Application):
             shared.win.search_entry.set_position(-1)
 
         shared.win.present()
+        self.log_first_frame(activate_time)
+
+        # Stream the games into the already visible window
+        self.state = shared.AppState.LOAD_FROM_DISK
+        for action in ("import", "add_game"):
+            self.lookup_action(action).set_enabled(False)
+        self.load_games_from_disk(self.games_loaded)
+
+    def games_loaded(self) -> None:
+        """Called once the games from disk are all in the library"""
+        self.state = shared.AppState.DEFAULT
+        shared.win.queue_source_rows_update()
+
+        # Enable the rest of the managers for game imports
+        for manager_type in (CoverManager, FileManager):
+            shared.store.toggle_manager_in_pipelines(manager_type, True)
+        shared.store.enrichment_queue.resume()
+
+        for action in ("import", "add_game"):
+            self.lookup_action(action).set_enabled(True)
 
         if shared.schema.get_boolean("auto-import"):
             self.on_import_action()
 
+    def do_shutdown(self) -> None:  # pylint: disable=arguments-differ
+        """Called on app exit"""
+        # Make sure pending saves are written
+        if file_manager := shared.store.managers.get(FileManager):
+            file_manager.drain()
+        shared.store.enrichment_queue.save()
+        if steam_api_manager := shared.store.managers.get(SteamAPIManager):
+            steam_api_manager.steam_rate_limiter.save()
+
+        Adw.Application.do_shutdown(self)
+
     def do_handle_local_options(self, options: GLib.VariantDict) -> int:
         if search := options.lookup_value("search"):
             self.init_search_term = search.get_string()
         elif game_id := options.lookup_value("launch"):
+            sync_library_storage()
+            database = get_library_database()
             try:
-                data = json.load(
-                    (path := shared.games_dir / (game_id.get_string() + ".json")).open(
-                        "r", encoding="utf-8"
+                if database:
+                    if not (data := database.get(game_id.get_string())):
+                        return 1
+                else:
+                    data = json.load(
+                        (
+                            path := shared.games_dir / (game_id.get_string() + ".json")
+                        ).open("r", encoding="utf-8")
                     )
-                )
                 executable = (
                     shlex.join(data["executable"])
                     if isinstance(data["executable"], list)
@@ -199,9 +244,18 @@ class CartridgesApplication(Adw.Application):
                 run_executable(executable)
 
                 data["last_played"] = int(time())
-                json.dump(data, path.open("w", encoding="utf-8"))
-
-            except (IndexError, KeyError, OSError, json.decoder.JSONDecodeError):
+                if database:
+                    database.save(data)
+                else:
+                    write_atomically(path, json.dumps(data))
+
+            except (
+                IndexError,
+                KeyError,
+                OSError,
+                json.decoder.JSONDecodeError,
+                sqlite3.Error,
+            ):
                 return 1
 
             self.register()
@@ -217,15 +271,87 @@ class CartridgesApplication(Adw.Application):
             return 0
         return -1
 
-    def load_games_from_disk(self) -> None:
-        if shared.games_dir.is_dir():
-            for game_file in shared.games_dir.iterdir():
-                try:
-                    data = json.load(game_file.open())
-                except (OSError, json.decoder.JSONDecodeError):
-                    continue
+    def load_games_from_disk(self, callback: Callable[[], Any]) -> None:
+        """
+        Load the games from disk into the library.
+
+        Records are read in a separate thread, then games are added in idle chunks.
+        They are sorted like the library beforehand, so the top rows come first.
+        """
+        records = []
+        timings = {}
+        widgets_time = 0.0
+
+        def add_chunk() -> bool:
+            nonlocal widgets_time
+
+            start = perf_counter()
+            chunk = tuple(islice(games_iter, 100))
+            for data in chunk:
                 game = Game(data)
                 shared.store.add_game(game, {"skip_save": True})
+            widgets_time += perf_counter() - start
+
+            if chunk:
+                shared.win.queue_source_rows_update()
+                return True
+
+            logging.info(
+                "Loaded %d games: read %d ms, parse %d ms, widgets %d ms",
+                len(records),
+                timings.get("read", 0) * 1000,
+                timings.get("parse", 0) * 1000,
+                widgets_time * 1000,
+            )
+            callback()
+            return False
+
+        def thread_func(*_args: Any) -> None:
+            sync_library_storage()
+            records.extend(load_game_records(timings))
+
+        def task_callback(*_args: Any) -> None:
+            self.sort_records(records)
+            GLib.idle_add(add_chunk)
+
+        # Sorting the list in place before iterating is fine
+        games_iter = iter(records)
+        Gio.Task.new(None, None, task_callback, None).run_in_thread(thread_func)
+
+    def sort_records(self, records: list[dict[str, Any]]) -> None:
+        """Sort game records like the library, from top to bottom"""
+        sort_state = shared.win.sort_state
+
+        if sort_state in ("a-z", "z-a"):
+            records.sort(
+                key=lambda data: str(data.get("name")).lower().removeprefix("the "),
+                reverse=sort_state == "z-a",
+            )
+            return
+
+        key = "last_played" if sort_state == "last_played" else "added"
+
+        def get_timestamp(data: dict[str, Any]) -> int:
+            # A bad value in one record mustn't stop the whole library from loading
+            try:
+                return int(data.get(key) or 0)
+            except (TypeError, ValueError, OverflowError):
+                return 0
+
+        records.sort(key=get_timestamp, reverse=sort_state != "oldest")
+
+    def log_first_frame(self, start_time: float) -> None:
+        """Log the time it took to paint the first frame of the window"""
+        if not (frame_clock := shared.win.get_frame_clock()):
+            return
+
+        def after_paint(*_args: Any) -> None:
+            frame_clock.disconnect(handler_id)
+            logging.info(
+                "First frame after %d ms", (perf_counter() - start_time) * 1000
+            )
+
+        handler_id = frame_clock.connect("after-paint", after_paint)
 
     def get_source_name(self, source_id: str) -> Any:
         if source_id == "all":
@@ -293,26 +293,25 @@ class CartridgesPreferences(Adw.PreferencesDialog):
         self.removed_games = set()
         self.toast.dismiss()
         shared.win.get_application().state = shared.AppState.DEFAULT
-        shared.win.create_source_rows()
+        shared.win.queue_source_rows_update()
 
         return True
 
     def remove_all_games(self, *_args: Any) -> None:
         shared.win.get_application().state = shared.AppState.REMOVE_ALL_GAMES
         shared.win.row_selected(None, shared.win.all_games_row_box.get_parent())
-        for game in shared.store:
-            if not game.removed:
-                self.removed_games.add(game)
-                game.removed = True
-                game.save()
-                game.update()
+        for game in shared.store.games_without_flag("removed"):
+            self.removed_games.add(game)
+            game.removed = True
+            game.save()
+            game.update()
 
         if shared.win.navigation_view.get_visible_page() == shared.win.details_page:
             shared.win.navigation_view.pop()
 
         self.add_toast(self.toast)
         shared.win.get_application().state = shared.AppState.DEFAULT
-        shared.win.create_source_rows()
+        shared.win.queue_source_rows_update()
 
     def reset_app(self, *_args: Any) -> None:
         rmtree(shared.data_dir / "cartridges", True)
@@ -60,6 +60,11 @@ flatpak_dir: Path
 
 games_dir: Path
 covers_dir: Path
+library_db_path: Path
+library_snapshot_path: Path
+enrichment_queue_path: Path
+http_cache_dir: Path
+steam_app_cache_path: Path
 
 appdata_dir: Path
 local_appdata_dir: Path
@@ -0,0 +1,385 @@
+# database.py
+#
+# Copyright 2024 kramo
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+import json
+import logging
+import os
+import sqlite3
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from threading import Lock
+from time import perf_counter
+from typing import Any, Iterable, Optional
+
+from cartridges import shared
+from cartridges.utils.write_atomically import write_atomically
+
+
+class LibraryDatabase:
+    """
+    Single-file transactional storage for the game library.
+
+    Every game is a row holding its game_id.json contents,
+    so the data stays compatible with the per-game JSON layout.
+    """
+
+    schema_version = 1
+
+    path: Path
+    connection: sqlite3.Connection
+    lock: Lock
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.lock = Lock()
+        # Managers save games from worker threads, access is serialized by the lock
+        self.connection = sqlite3.connect(path, check_same_thread=False)
+        with self.lock, self.connection:
+            self.connection.execute("PRAGMA journal_mode=WAL")
+            self.connection.execute("PRAGMA synchronous=NORMAL")
+            self.connection.execute(
+                "CREATE TABLE IF NOT EXISTS games (game_id TEXT PRIMARY KEY, data TEXT NOT NULL)"
+            )
+            self.connection.execute(f"PRAGMA user_version={self.schema_version}")
+
+    def read(self) -> list[str]:
+        """Get the serialized record of every game in a single sequential read"""
+        with self.lock:
+            rows = self.connection.execute("SELECT data FROM games").fetchall()
+        return [data for (data,) in rows]
+
+    def load(self) -> list[dict[str, Any]]:
+        """Get every game record"""
+        return parse_records(self.read())
+
+    def get(self, game_id: str) -> Optional[dict[str, Any]]:
+        """Get a single game record"""
+        with self.lock:
+            row = self.connection.execute(
+                "SELECT data FROM games WHERE game_id = ?", (game_id,)
+            ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def save(self, *records: dict[str, Any]) -> None:
+        """Insert or replace game records in one transaction"""
+        with self.lock, self.connection:
+            self.connection.executemany(
+                "INSERT OR REPLACE INTO games (game_id, data) VALUES (?, ?)",
+                (
+                    (record["game_id"], json.dumps(record, sort_keys=True))
+                    for record in records
+                ),
+            )
+
+    def delete(self, *game_ids: str) -> None:
+        """Delete game records in one transaction"""
+        with self.lock, self.connection:
+            self.connection.executemany(
+                "DELETE FROM games WHERE game_id = ?",
+                ((game_id,) for game_id in game_ids),
+            )
+
+    def close(self) -> None:
+        with self.lock:
+            self.connection.close()
+
+    def import_json(self, games_dir: Path) -> int:
+        """Import the games from the per-game JSON layout, return the count"""
+        records = [record for record in load_json_dir(games_dir) if "game_id" in record]
+        self.save(*records)
+        return len(records)
+
+    def export_json(self, games_dir: Path) -> None:
+        """Write the games back to the per-game JSON layout"""
+        games_dir.mkdir(parents=True, exist_ok=True)
+        for record in self.load():
+            write_atomically(
+                games_dir / f"{record['game_id']}.json",
+                json.dumps(record, indent=4, sort_keys=True),
+            )
+
+
+def parse_records(serialized: Iterable[str]) -> list[dict[str, Any]]:
+    """Parse serialized game records, skipping the invalid ones"""
+    records = []
+    for data in serialized:
+        try:
+            records.append(json.loads(data))
+        except json.decoder.JSONDecodeError:
+            continue
+    return records
+
+
+def load_json_files(
+    paths: Iterable[Path],
+) -> tuple[dict[str, dict[str, Any]], set[str], float, float]:
+    """
+    Read and parse game files.
+    Return the records by file name, the names of the files that aren't valid
+    JSON, and the time spent reading and parsing.
+    """
+    contents = {}
+    start = perf_counter()
+    for path in paths:
+        try:
+            contents[path.name] = path.read_text("utf-8")
+        except OSError:
+            continue
+    read_end = perf_counter()
+
+    records = {}
+    invalid = set()
+    for name, data in contents.items():
+        try:
+            records[name] = json.loads(data)
+        except json.decoder.JSONDecodeError:
+            invalid.add(name)
+    return records, invalid, read_end - start, perf_counter() - read_end
+
+
+def load_json_paths(
+    paths: list[Path],
+    timings: Optional[dict[str, float]] = None,
+    invalid: Optional[set[str]] = None,
+) -> dict[str, dict[str, Any]]:
+    """
+    Get the records of game files by file name.
+    Files are read and parsed in chunks spread across a thread pool.
+
+    If given, `invalid` is filled with the names of the files that aren't valid JSON.
+    """
+    chunk_size = 256
+    chunks = (
+        paths[index : index + chunk_size] for index in range(0, len(paths), chunk_size)
+    )
+
+    records = {}
+    with ThreadPoolExecutor() as executor:
+        for chunk_records, chunk_invalid, read_time, parse_time in executor.map(
+            load_json_files, chunks
+        ):
+            records.update(chunk_records)
+            if invalid is not None:
+                invalid.update(chunk_invalid)
+            if timings is not None:
+                timings["read"] = timings.get("read", 0) + read_time
+                timings["parse"] = timings.get("parse", 0) + parse_time
+    return records
+
+
+def load_json_dir(
+    games_dir: Path, timings: Optional[dict[str, float]] = None
+) -> list[dict[str, Any]]:
+    """Get the records of the game files in a directory"""
+    if not games_dir.is_dir():
+        return []
+    paths = [path for path in games_dir.iterdir() if path.suffix == ".json"]
+    return list(load_json_paths(paths, timings).values())
+
+
+class LibrarySnapshot:
+    """
+    Read-optimized copy of every game file, loaded in a single read.
+
+    The game files stay authoritative. A manifest of their modification times,
+    sizes and inodes is kept alongside the records, to only reload the ones
+    that changed. Files are written by replacing them, so a new inode
+    catches changes within the precision of the modification times.
+    Files that aren't valid JSON are in the manifest without a record,
+    so they are only parsed again once they change.
+    """
+
+    version = 2
+
+    path: Path
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+
+    def read(self) -> Optional[dict[str, Any]]:
+        """Get the contents of the snapshot if it is usable"""
+        try:
+            header, body = self.path.read_bytes().split(b"\n", 1)
+        except (OSError, ValueError):
+            return None
+        if header != f"cartridges-snapshot {self.version}".encode():
+            return None
+        try:
+            return json.loads(body)
+        except json.decoder.JSONDecodeError:
+            return None
+
+    def write(self, contents: dict[str, Any]) -> None:
+        """Replace the snapshot with new contents"""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        try:
+            write_atomically(
+                self.path,
+                f"cartridges-snapshot {self.version}\n"
+                + json.dumps(contents, separators=(",", ":")),
+            )
+        except OSError as error:
+            logging.warning("Couldn't write the library snapshot", exc_info=error)
+
+    def load(
+        self,
+        games_dir: Path,
+        timings: Optional[dict[str, float]] = None,
+        update: bool = True,
+    ) -> list[dict[str, Any]]:
+        """
+        Get the records of the game files in a directory from the snapshot.
+        Stale or missing records are reloaded from their files,
+        then the snapshot is rewritten unless `update` is False.
+        """
+        manifest = {}
+        try:
+            with os.scandir(games_dir) as entries:
+                for entry in entries:
+                    if entry.name.endswith(".json"):
+                        try:
+                            stat = entry.stat()
+                        except OSError:
+                            continue
+                        manifest[entry.name] = [
+                            stat.st_mtime_ns,
+                            stat.st_size,
+                            stat.st_ino,
+                        ]
+        except OSError:
+            return []
+
+        start = perf_counter()
+        snapshot = self.read() or {"manifest": {}, "records": {}}
+        if timings is not None:
+            timings["read"] = timings.get("read", 0) + perf_counter() - start
+
+        records = {
+            name: record
+            for name, record in snapshot["records"].items()
+            if snapshot["manifest"].get(name) == manifest.get(name)
+        }
+        stale = [
+            name
+            for name, stat in manifest.items()
+            if snapshot["manifest"].get(name) != stat
+        ]
+        if not stale and len(manifest) == len(snapshot["manifest"]):
+            return list(records.values())
+
+        logging.debug("Reloading %d game files for the library snapshot", len(stale))
+        invalid = set()
+        records.update(
+            load_json_paths([games_dir / name for name in stale], timings, invalid)
+        )
+
+        if update:
+            # Files that couldn't be read are tried again next time
+            for name in stale:
+                if name not in records and name not in invalid:
+                    del manifest[name]
+            self.write({"manifest": manifest, "records": records})
+        return list(records.values())
+
+
+def load_game_records(
+    timings: Optional[dict[str, float]] = None, update_snapshot: bool = True
+) -> list[dict[str, Any]]:
+    """
+    Get the records of every game from the storage backend in use.
+
+    If given, `timings` is filled with the seconds spent reading and parsing.
+    When parsing in parallel, those are summed over the workers.
+    Readers other than the app pass `update_snapshot=False`, to leave
+    the library snapshot to it.
+    """
+    if not (database := get_library_database()):
+        snapshot = LibrarySnapshot(shared.library_snapshot_path)
+        return snapshot.load(shared.games_dir, timings, update_snapshot)
+
+    start = perf_counter()
+    serialized = database.read()
+    read_end = perf_counter()
+    records = parse_records(serialized)
+    if timings is not None:
+        timings["read"] = read_end - start
+        timings["parse"] = perf_counter() - read_end
+    return records
+
+
+_database: Optional[LibraryDatabase] = None
+_database_resolved: bool = False
+
+
+def get_library_database() -> Optional[LibraryDatabase]:
+    """
+    Get the library database if it is the storage backend in use.
+
+    The backend is picked once per process, toggling the setting
+    takes effect on the next start, see `sync_library_storage`.
+    """
+    global _database, _database_resolved  # pylint: disable=global-statement
+
+    if not _database_resolved:
+        _database_resolved = True
+        if (
+            shared.schema.get_boolean("library-database")
+            and shared.library_db_path.is_file()
+        ):
+            _database = LibraryDatabase(shared.library_db_path)
+    return _database
+
+
+def sync_library_storage() -> None:
+    """
+    Move the library to the storage backend picked in the settings.
+    Must be called before `get_library_database` is used.
+
+    * On first use of the database, migrate the per-game JSON files into it
+    * When going back to JSON files, export the database then retire it
+
+    The database only exists once a migration is complete, it is built
+    under a temporary name then renamed.
+    """
+    enabled = shared.schema.get_boolean("library-database")
+    if enabled == shared.library_db_path.is_file():
+        return
+
+    if enabled:
+        db_path = shared.library_db_path
+        tmp_path = db_path.with_name(f".{db_path.name}.tmp")
+        # Remains of an interrupted migration
+        for path in db_path.parent.glob(f"{tmp_path.name}*"):
+            path.unlink(missing_ok=True)
+
+        database = LibraryDatabase(tmp_path)
+        n_games = database.import_json(shared.games_dir)
+        # Closing the last connection moves the WAL contents into the file
+        database.close()
+        os.replace(tmp_path, db_path)
+        logging.info("Migrated %d games to the library database", n_games)
+        return
+
+    database = LibraryDatabase(shared.library_db_path)
+    database.export_json(shared.games_dir)
+    database.close()
+    for path in shared.library_db_path.parent.glob(f"{shared.library_db_path.name}*"):
+        path.unlink(missing_ok=True)
+    logging.info("Exported the library database to JSON files")
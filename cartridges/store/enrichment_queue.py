@@ -0,0 +1,204 @@
+# enrichment_queue.py
+#
+# Copyright 2024 kramo
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+import json
+import logging
+from typing import TYPE_CHECKING, Any, Iterable, Optional
+
+from gi.repository import GLib
+
+from cartridges import shared
+from cartridges.errors.friendly_error import FriendlyError
+from cartridges.game import Game
+from cartridges.store.managers.manager import Manager
+from cartridges.store.pipeline import Pipeline
+from cartridges.utils.create_dialog import create_dialog
+from cartridges.utils.http_client import http_client
+from cartridges.utils.write_atomically import write_atomically
+
+if TYPE_CHECKING:
+    from cartridges.store.store import Store
+
+
+class EnrichmentQueue:
+    """
+    Persistent queue of games waiting for their online data.
+
+    Imports finish once games are saved and shown from local data,
+    the network managers then run on the games from this queue.
+    Queued games are kept on disk, so enrichment resumes after a restart.
+    """
+
+    version = 1
+
+    # Keys of the additional data used by the enrichment managers
+    data_keys = ("steam_appid", "online_cover_url")
+
+    # Delay in ms before changes to the queue are written
+    save_delay: int = 1000
+
+    store: "Store"
+    managers: set[Manager]
+    entries: dict[str, dict[str, Any]]
+    pipelines: dict[str, Pipeline]
+    plan: Optional[tuple[dict, dict]] = None
+    n_done: int = 0
+    n_total: int = 0
+    save_source_id: int = 0
+
+    def __init__(self, store: "Store") -> None:
+        self.store = store
+        self.managers = set()
+        self.entries = {}
+        self.pipelines = {}
+
+    def add_manager(self, manager: Manager) -> None:
+        self.managers.add(manager)
+        self.plan = None
+
+    def add(self, game: Game, additional_data: dict) -> None:
+        """Queue a game for enrichment, may be called from any thread"""
+        data = {
+            key: additional_data[key]
+            for key in self.data_keys
+            if key in additional_data
+        }
+        GLib.idle_add(self.__add, game.game_id, data)
+
+    def __add(self, game_id: str, data: dict[str, Any]) -> None:
+        if game_id not in self.entries:
+            self.n_total += 1
+        self.entries[game_id] = data
+        self.queue_save()
+        self.start(game_id)
+
+    def resume(self) -> None:
+        """Start enriching the games left in the queue at the last exit"""
+        try:
+            contents = json.loads(shared.enrichment_queue_path.read_text("utf-8"))
+        except (OSError, json.decoder.JSONDecodeError):
+            return
+        if contents.get("version") != self.version:
+            return
+
+        entries = contents.get("games", {})
+        logging.info("Resuming the enrichment of %d games", len(entries))
+        for game_id, data in entries.items():
+            if game_id not in self.entries:
+                self.entries[game_id] = data
+                self.n_total += 1
+                self.start(game_id)
+
+    def start(self, game_id: str) -> None:
+        """Run the enrichment managers on a queued game"""
+        if game_id in self.pipelines:
+            return
+
+        game = self.store.get(game_id)
+        if not game or game.removed or game.blacklisted:
+            self.entries.pop(game_id, None)
+            self.done(None)
+            return
+
+        if not self.plan:
+            self.plan = self.store.get_pipeline_plan(self.managers)
+
+        pipeline = Pipeline(game, dict(self.entries[game_id]), *self.plan)
+        pipeline.connect("advanced", self.pipeline_advanced)
+        self.pipelines[game_id] = pipeline
+        pipeline.advance()
+        if pipeline.is_done and game_id in self.pipelines:
+            self.done(game)
+
+    def pipeline_advanced(self, pipeline: Pipeline) -> None:
+        game = pipeline.game
+        if self.pipelines.get(game.game_id) is not pipeline:
+            # Dropped from the queue
+            return
+        if game.removed or game.blacklisted:
+            pipeline.cancel()
+        if pipeline.is_done:
+            self.done(game)
+
+    def drop(self, game_ids: Iterable[str]) -> None:
+        """Remove games from the queue, their running managers finish unsaved"""
+        for game_id in game_ids:
+            if self.entries.pop(game_id, None) is None:
+                continue
+            if pipeline := self.pipelines.pop(game_id, None):
+                pipeline.cancel()
+            self.done(None)
+
+    def done(self, game: Optional[Game]) -> None:
+        """Record that a game left the queue"""
+        if game:
+            del self.pipelines[game.game_id]
+            self.entries.pop(game.game_id, None)
+            if not game.removed:
+                game.save()
+                game.update()
+
+        self.n_done += 1
+        self.queue_save()
+
+        if self.pipelines:
+            shared.win.set_enrichment_progress(self.n_done, self.n_total)
+            return
+
+        self.n_done = self.n_total = 0
+        shared.win.set_enrichment_progress(0, 0)
+        http_client.log_stats()
+        self.report_errors()
+
+    def report_errors(self) -> None:
+        """Tell the user about the first error that they can act on"""
+        errors = []
+        for manager in self.managers:
+            errors.extend(manager.collect_errors())
+        for error in errors:
+            if isinstance(error, FriendlyError):
+                create_dialog(shared.win, error.title, error.subtitle)
+                return
+
+    def queue_save(self) -> None:
+        if not self.save_source_id:
+            self.save_source_id = GLib.timeout_add(self.save_delay, self.__save_timeout)
+
+    def __save_timeout(self) -> bool:
+        self.save_source_id = 0
+        self.save()
+        return False
+
+    def save(self) -> None:
+        """Write the queue to disk"""
+        if self.save_source_id:
+            GLib.source_remove(self.save_source_id)
+            self.save_source_id = 0
+
+        path = shared.enrichment_queue_path
+        try:
+            if not self.entries:
+                path.unlink(missing_ok=True)
+                return
+            path.parent.mkdir(parents=True, exist_ok=True)
+            write_atomically(
+                path, json.dumps({"version": self.version, "games": self.entries})
+            )
+        except OSError as error:
+            logging.warning("Couldn't save the enrichment queue", exc_info=error)
@@ -0,0 +1,123 @@
+# library_index.py
+#
+# Copyright 2024 kramo
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+from threading import Lock
+from typing import TYPE_CHECKING, Iterable, Optional
+
+if TYPE_CHECKING:
+    from cartridges.game import Game
+
+
+class LibraryIndex:
+    """
+    Indexes of the games in the library, safe to update from any thread.
+
+    Games are indexed by ID, by source and by flag, so lookups
+    don't have to go through the whole library. The number of games
+    of each source is kept by state for the sidebar.
+    """
+
+    games: dict[str, "Game"]
+    source_games: dict[str, dict[str, "Game"]]
+    flag_games: dict[str, set[str]]
+    source_counts: dict[str, dict[str, int]]
+    game_states: dict[str, str]
+    changed_sources: set[str]
+    lock: Lock
+
+    def __init__(self, flags: Iterable[str]) -> None:
+        self.games = {}
+        self.source_games = {}
+        self.flag_games = {flag: set() for flag in flags}
+        self.source_counts = {}
+        self.game_states = {}
+        self.changed_sources = set()
+        self.lock = Lock()
+
+    def add(self, game: "Game") -> None:
+        """Add or replace a game in the indexes"""
+        with self.lock:
+            self.games[game.game_id] = game
+            self.source_games.setdefault(game.base_source, {})[game.game_id] = game
+            self.__update(game)
+
+    def update_flags(self, game: "Game") -> None:
+        """Update the indexes after a game's flags changed"""
+        with self.lock:
+            if self.games.get(getattr(game, "game_id", None)) is not game:
+                # Not the stored instance (eg. a duplicate being scanned)
+                return
+            self.__update(game)
+
+    def __update(self, game: "Game") -> None:
+        for flag, game_ids in self.flag_games.items():
+            if getattr(game, flag):
+                game_ids.add(game.game_id)
+            else:
+                game_ids.discard(game.game_id)
+
+        # Move the game to the count of its state in its source
+        if game.removed or game.blacklisted:
+            state = "removed"
+        elif game.hidden:
+            state = "hidden"
+        else:
+            state = "visible"
+
+        previous_state = self.game_states.get(game.game_id)
+        if state == previous_state:
+            return
+
+        counts = self.source_counts.setdefault(
+            game.base_source, {"visible": 0, "hidden": 0, "removed": 0}
+        )
+        if previous_state:
+            counts[previous_state] -= 1
+        counts[state] += 1
+        self.game_states[game.game_id] = state
+        self.changed_sources.add(game.base_source)
+
+    def games_without_flag(
+        self, flag: str, source_id: Optional[str] = None
+    ) -> list["Game"]:
+        """Get the games that don't have the given flag set, optionally of a source"""
+        with self.lock:
+            games = (
+                self.games if source_id is None else self.source_games.get(source_id)
+            )
+            if not games:
+                return []
+            flagged = self.flag_games[flag]
+            return [game for game_id, game in games.items() if game_id not in flagged]
+
+    def get_source_count(self, source_id: str, state: str = "visible") -> int:
+        """Get the number of games of a source in a state"""
+        with self.lock:
+            return self.source_counts.get(source_id, {}).get(state, 0)
+
+    def get_total_count(self, state: str = "visible") -> int:
+        """Get the number of games of all sources in a state"""
+        with self.lock:
+            return sum(counts[state] for counts in self.source_counts.values())
+
+    def take_changed_sources(self) -> set[str]:
+        """Get the sources whose counts changed since the last call"""
+        with self.lock:
+            changed_sources, self.changed_sources = self.changed_sources, set()
+        return changed_sources
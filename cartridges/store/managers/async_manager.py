@@ -17,23 +17,68 @@
 #
 # SPDX-License-Identifier: GPL-3.0-or-later
 
+import logging
+import os
 from typing import Any, Callable
 
-from gi.repository import Gio
+from gi.repository import Gio, GLib
 
 from cartridges.game import Game
 from cartridges.store.managers.manager import Manager
+from cartridges.utils.worker_pool import WorkerPool
 
 
 class AsyncManager(Manager):
-    """Manager that can run asynchronously"""
+    """
+    Manager that can run asynchronously
+
+    Games are processed on the manager's own bounded worker pool,
+    queued fairly between the sources they come from.
+    Games given a priority with `set_priorities` are processed first.
+    The pool size can be overridden for benchmarking with the environment variable
+    `CARTRIDGES_MANAGER_WORKERS`, eg. `SteamAPIManager=1,CoverManager=4`.
+    """
 
     blocking = False
     cancellable: Gio.Cancellable = None
 
+    # Number of games processed at once, depending on what limits the manager
+    max_workers: int = 4
+    worker_pool: WorkerPool
+
     def __init__(self) -> None:
         super().__init__()
         self.cancellable = Gio.Cancellable()
+        self.worker_pool = WorkerPool(self.name, self.get_max_workers())
+
+    def get_max_workers(self) -> int:
+        """Get the size of the worker pool, from the environment if set there"""
+        for override in os.environ.get("CARTRIDGES_MANAGER_WORKERS", "").split(","):
+            name, _sep, value = override.partition("=")
+            if name.strip() == self.name:
+                try:
+                    return int(value)
+                except ValueError:
+                    logging.warning("Invalid worker count for %s: %s", self.name, value)
+        return self.max_workers
+
+    def is_cancelled(self) -> bool:
+        return self.cancellable.is_cancelled()
+
+    def schedule_retry(
+        self, game: Game, attempt: Callable[[], Any], delay: float
+    ) -> None:
+        """Queue a retry attempt on the worker pool after a delay"""
+
+        def timeout() -> bool:
+            self.worker_pool.submit(attempt, game.base_source, game.game_id)
+            return GLib.SOURCE_REMOVE
+
+        GLib.timeout_add(int(delay * 1000), timeout)
+
+    def set_priorities(self, priorities: dict[str, int]) -> None:
+        """Set the priorities of games by ID, higher ones are processed first"""
+        self.worker_pool.set_priorities(priorities)
 
     def cancel_tasks(self):
         """Cancel all tasks for this manager"""
@@ -47,16 +92,40 @@ class AsyncManager(Manager):
     def process_game(
         self, game: Game, additional_data: dict, callback: Callable[["Manager"], Any]
     ) -> None:
-        """Create a task to process the game in a separate thread"""
-        task = Gio.Task.new(None, self.cancellable, self._task_callback, (callback,))
-        task.run_in_thread(lambda *_: self._task_thread_func((game, additional_data)))
-
-    def _task_thread_func(self, data):
-        """Task thread entry point"""
-        game, additional_data, *_rest = data
-        self.run(game, additional_data)
-
-    def _task_callback(self, _source_object, _result, data):
-        """Method run after the task is done"""
-        callback, *_rest = data
-        callback(self)
+        """Queue the game to be processed in a worker thread"""
+        cancellable = self.cancellable
+        self.worker_pool.submit(
+            lambda: self._job_func(game, additional_data, callback, cancellable),
+            game.base_source,
+            game.game_id,
+        )
+
+    def _job_func(
+        self,
+        game: Game,
+        additional_data: dict,
+        callback: Callable[["Manager"], Any],
+        cancellable: Gio.Cancellable,
+    ) -> None:
+        """Worker job, the callback is handed back to the main loop"""
+        if cancellable.is_cancelled():
+            GLib.idle_add(callback, self)
+            return
+        self.run(game, additional_data, lambda: GLib.idle_add(callback, self))
+
+    def log_worker_stats(self) -> None:
+        """Log the queueing stats of the worker pool"""
+        stats = self.worker_pool.stats
+        if not stats["n_done"]:
+            return
+        logging.info(
+            "%s: %d jobs on %d workers, max queue %d, wait mean %d ms, max %d ms, "
+            "%d retries",
+            self.name,
+            stats["n_done"],
+            self.worker_pool.max_workers,
+            stats["max_queued"],
+            stats["total_wait"] / stats["n_done"] * 1000,
+            stats["max_wait"] * 1000,
+            self.metrics["retries"],
+        )
@@ -21,14 +21,13 @@
 from pathlib import Path
 from typing import NamedTuple
 
-import requests
 from gi.repository import GdkPixbuf, Gio
 from requests.exceptions import HTTPError, SSLError
 
 from cartridges import shared
 from cartridges.game import Game
-from cartridges.store.managers.manager import Manager
-from cartridges.store.managers.steam_api_manager import SteamAPIManager
+from cartridges.store.managers.async_manager import AsyncManager
+from cartridges.utils.http_client import http_client
 from cartridges.utils.save_cover import convert_cover, save_cover
 
 
@@ -80,23 +79,29 @@ class ImageSize(NamedTuple):
         return ImageSize(1, 1).element_wise_div(self)
 
 
-class CoverManager(Manager):
+class CoverManager(AsyncManager):
     """
     Manager in charge of adding the cover image of the game
 
     Order of priority is:
     1. local cover
     2. icon cover
-    3. online cover
+    3. online cover, see `OnlineCoverManager`
     """
 
-    run_after = (SteamAPIManager,)
     retryable_on = (HTTPError, SSLError, ConnectionError)
 
+    # Keys of the additional data that may hold an image for the cover
+    image_keys: tuple[str, ...] = ("local_image_path", "local_icon_path")
+    uses_additional_data = True
+
+    # Compositing covers is CPU bound, keep threads from starving the main loop
+    max_workers = 2
+
     def download_image(self, url: str) -> Path:
         image_file = Gio.File.new_tmp()[0]
         path = Path(image_file.get_path())
-        with requests.get(url, timeout=5) as cover:
+        with http_client.get(url) as cover:
             cover.raise_for_status()
             path.write_bytes(cover.content)
         return path
@@ -168,11 +173,7 @@ class CoverManager(Manager):
     def main(self, game: Game, additional_data: dict) -> None:
         if game.blacklisted:
             return
-        for key in (
-            "local_image_path",
-            "local_icon_path",
-            "online_cover_url",
-        ):
+        for key in self.image_keys:
             # Get an image path
             if not (value := additional_data.get(key)):
                 continue
@@ -19,43 +19,36 @@
 
 from cartridges import shared
 from cartridges.game import Game
-from cartridges.game_cover import GameCover
 from cartridges.store.managers.manager import Manager
-from cartridges.store.managers.sgdb_manager import SgdbManager
-from cartridges.store.managers.steam_api_manager import SteamAPIManager
 
 
 class DisplayManager(Manager):
     """Manager in charge of adding a game to the UI"""
 
-    run_after = (SteamAPIManager, SgdbManager)
     signals = {"update-ready"}
 
-    def main(self, game: Game, _additional_data: dict) -> None:
-        if game.get_parent():
-            game.get_parent().get_parent().remove(game)
-            if game.get_parent():
-                game.get_parent().set_child()
-
-        game.menu_button.set_menu_model(
-            game.hidden_game_options if game.hidden else game.game_options
-        )
-
-        game.title.set_label(game.name)
-
-        game.menu_button.get_popover().connect(
-            "notify::visible", game.toggle_play, None
-        )
-        game.menu_button.get_popover().connect(
-            "notify::visible", shared.win.set_active_game, game
-        )
+    # Changes that affect how a game gets filtered, sorted or drawn
+    displayed_attrs = {"name", "developer", "added", "last_played", "cover"}
+    flag_attrs = {"hidden", "removed", "blacklisted"}
 
-        if game.game_id in shared.win.game_covers:
-            game.game_cover = shared.win.game_covers[game.game_id]
-            game.game_cover.add_picture(game.cover)
-        else:
-            game.game_cover = GameCover({game.cover}, game.get_cover_path())
-            shared.win.game_covers[game.game_id] = game.game_cover
+    def main(self, game: Game, _additional_data: dict) -> None:
+        dirty = game.take_dirty()
+        item = shared.win.game_items.get(game.game_id)
+        if item and item.game is not game:
+            # The game replaces another one with its ID
+            shared.win.remove_game_item(game)
+            item = None
+
+        if game.removed or game.blacklisted:
+            # Only list games that get displayed
+            shared.win.remove_game_item(game)
+        elif not item or "hidden" in dirty:
+            shared.store.search_index.update(game)
+            shared.win.remove_game_item(game)
+            shared.win.add_game_item(game)
+        elif dirty & self.displayed_attrs:
+            shared.store.search_index.update(game)
+            shared.win.update_game_item(game, dirty)
 
         if (
             shared.win.navigation_view.get_visible_page() == shared.win.details_page
@@ -63,14 +56,5 @@ class DisplayManager(Manager):
         ):
             shared.win.show_details_page(game)
 
-        if not game.removed and not game.blacklisted:
-            if game.hidden:
-                shared.win.hidden_library.append(game)
-            else:
-                shared.win.library.append(game)
-            game.get_parent().set_focusable(False)
-
-        shared.win.set_library_child()
-
-        if shared.win.get_application().state == shared.AppState.DEFAULT:
-            shared.win.create_source_rows()
+        if not item or dirty & self.flag_attrs:
+            shared.win.queue_source_rows_update()
@@ -18,42 +18,103 @@
 # SPDX-License-Identifier: GPL-3.0-or-later
 
 import json
+import logging
+from threading import Lock
+from typing import Any, Callable, Optional
+
+from gi.repository import Gio, GLib
 
 from cartridges import shared
 from cartridges.game import Game
+from cartridges.store.database import get_library_database
 from cartridges.store.managers.async_manager import AsyncManager
-from cartridges.store.managers.steam_api_manager import SteamAPIManager
+from cartridges.utils.write_atomically import write_atomically
 
 
 class FileManager(AsyncManager):
-    """Manager in charge of saving a game to a file"""
+    """
+    Manager in charge of saving a game to a file
+
+    Saves are queued and written behind on a short timer,
+    repeated saves of the same game are merged into one write.
+    """
 
-    run_after = (SteamAPIManager,)
     signals = {"save-ready"}
+    uses_additional_data = True
+
+    # Saves are only queued here, the writes happen in `drain`
+    max_workers = 1
+
+    # Delay in ms before pending saves are written
+    flush_delay: int = 500
+
+    pending: dict[str, dict[str, Any]]
+    pending_lock: Lock
+    write_lock: Lock
+    flush_source_id: Optional[int] = None
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.pending = {}
+        self.pending_lock = Lock()
+        self.write_lock = Lock()
 
     def main(self, game: Game, additional_data: dict) -> None:
         if additional_data.get("skip_save"):  # Skip saving when loading games from disk
             return
 
-        shared.games_dir.mkdir(parents=True, exist_ok=True)
-
-        attrs = (
-            "added",
-            "executable",
-            "game_id",
-            "source",
-            "hidden",
-            "last_played",
-            "name",
-            "developer",
-            "removed",
-            "blacklisted",
-            "version",
-        )
-
-        json.dump(
-            {attr: getattr(game, attr) for attr in attrs if attr},
-            (shared.games_dir / f"{game.game_id}.json").open("w", encoding="utf-8"),
-            indent=4,
-            sort_keys=True,
-        )
+        record = {attr: getattr(game, attr) for attr in game.data_attrs}
+
+        with self.pending_lock:
+            self.pending[game.game_id] = record
+            if self.flush_source_id is None:
+                self.flush_source_id = GLib.timeout_add(
+                    self.flush_delay, self.__flush_timeout
+                )
+
+    def __flush_timeout(self) -> bool:
+        with self.pending_lock:
+            self.flush_source_id = None
+        self.flush()
+        return False
+
+    def flush(self, callback: Optional[Callable[[], Any]] = None) -> None:
+        """
+        Write the pending saves in a separate thread.
+        The optional callback is called on the main loop once they are written.
+        """
+
+        def task_callback(*_args: Any) -> None:
+            if callback:
+                callback()
+
+        task = Gio.Task.new(None, None, task_callback, None)
+        task.run_in_thread(lambda *_: self.drain())
+
+    def drain(self) -> None:
+        """Write the pending saves, blocking until they are on disk"""
+        with self.write_lock:
+            with self.pending_lock:
+                records, self.pending = self.pending, {}
+                if self.flush_source_id is not None:
+                    GLib.source_remove(self.flush_source_id)
+                    self.flush_source_id = None
+
+            if not records:
+                return
+
+            logging.debug("Writing %d game files", len(records))
+
+            if database := get_library_database():
+                database.save(*records.values())
+                return
+
+            shared.games_dir.mkdir(parents=True, exist_ok=True)
+            for game_id, record in records.items():
+                try:
+                    write_atomically(
+                        shared.games_dir / f"{game_id}.json",
+                        json.dumps(record, indent=4, sort_keys=True),
+                    )
+                except OSError as error:
+                    logging.error("Couldn't save %s", game_id, exc_info=error)
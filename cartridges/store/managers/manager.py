@@ -19,8 +19,11 @@
 
 import logging
 from abc import abstractmethod
-from time import sleep
-from typing import Any, Callable, Container
+from random import uniform
+from threading import Lock
+from typing import Any, Callable, Container, Optional
+
+from gi.repository import GLib
 
 from cartridges.errors.error_producer import ErrorProducer
 from cartridges.errors.friendly_error import FriendlyError
@@ -45,6 +48,17 @@ class Manager(ErrorProducer):
     retry_delay: int = 3
     max_tries: int = 3
 
+    # Whether main reads the additional data, pipelines drop it once unused
+    uses_additional_data: bool = False
+
+    metrics: dict[str, float]
+    metrics_lock: Lock
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.metrics_lock = Lock()
+        self.reset_metrics()
+
     @property
     def name(self) -> str:
         return type(self).__name__
@@ -59,14 +73,52 @@ class Manager(ErrorProducer):
         * May raise other exceptions that will be reported
         """
 
-    def run(self, game: Game, additional_data: dict) -> None:
-        """Handle errors (retry, ignore or raise) that occur in the manager logic"""
+    def reset_metrics(self) -> None:
+        with self.metrics_lock:
+            self.metrics = {"runs": 0, "retries": 0, "retry_delay": 0, "errors": 0}
+
+    def count(self, metric: str, value: float = 1) -> None:
+        with self.metrics_lock:
+            self.metrics[metric] += value
+
+    def is_cancelled(self) -> bool:
+        """Check if the manager's pending work was cancelled"""
+        return False
+
+    def get_retry_delay(self, tries: int) -> float:
+        """Get the seconds to wait before a retry, with exponential backoff and jitter"""
+        delay = self.retry_delay * 2 ** (tries - 1)
+        return uniform(delay / 2, delay)
+
+    def schedule_retry(
+        self, _game: Game, attempt: Callable[[], Any], delay: float
+    ) -> None:
+        """Run a retry attempt after a delay, on the main loop"""
+
+        def timeout() -> bool:
+            attempt()
+            return GLib.SOURCE_REMOVE
+
+        GLib.timeout_add(int(delay * 1000), timeout)
+
+    def run(
+        self,
+        game: Game,
+        additional_data: dict,
+        callback: Optional[Callable[[], Any]] = None,
+    ) -> None:
+        """
+        Handle errors (retry, ignore or raise) that occur in the manager logic
+
+        Retries are scheduled after a delay instead of blocking the thread.
+        The optional callback is called once the manager is done with the game.
+        """
 
         # Keep track of the number of tries
         tries = 1
 
-        def handle_error(error: Exception) -> None:
-            nonlocal tries
+        def handle_error(error: Exception) -> bool:
+            """Handle an error, return whether the logic should be retried"""
 
             # If FriendlyError, handle its cause instead
             base_error = error
@@ -85,30 +137,48 @@ class Manager(ErrorProducer):
 
             if type(error) in self.continue_on:
                 # Handle skippable errors (skip silently)
-                return
+                return False
 
             if type(error) in self.retryable_on:
                 if tries > self.max_tries:
                     # Handle being out of retries
                     logging.error(out_of_retries_format, *log_args)
+                    self.count("errors")
                     self.report_error(base_error)
-                else:
-                    # Handle retryable errors
-                    logging.error(retrying_format, *log_args)
-                    sleep(self.retry_delay)
-                    tries += 1
-                    try_manager_logic()
+                    return False
+
+                # Handle retryable errors
+                logging.error(retrying_format, *log_args)
+                return True
 
-            else:
-                # Handle unretryable errors
-                logging.error(unretryable_format, *log_args, exc_info=error)
-                self.report_error(base_error)
+            # Handle unretryable errors
+            logging.error(unretryable_format, *log_args, exc_info=error)
+            self.count("errors")
+            self.report_error(base_error)
+            return False
 
         def try_manager_logic() -> None:
+            nonlocal tries
+
+            if tries > 1 and self.is_cancelled():
+                if callback:
+                    callback()
+                return
+
+            self.count("runs")
             try:
                 self.main(game, additional_data)
             except Exception as error:  # pylint: disable=broad-exception-caught
-                handle_error(error)
+                if handle_error(error):
+                    delay = self.get_retry_delay(tries)
+                    tries += 1
+                    self.count("retries")
+                    self.count("retry_delay", delay)
+                    self.schedule_retry(game, try_manager_logic, delay)
+                    return
+
+            if callback:
+                callback()
 
         try_manager_logic()
 
@@ -116,5 +186,4 @@ class Manager(ErrorProducer):
         self, game: Game, additional_data: dict, callback: Callable[["Manager"], Any]
     ) -> None:
         """Pass the game through the manager"""
-        self.run(game, additional_data)
-        callback(self)
+        self.run(game, additional_data, lambda: callback(self))
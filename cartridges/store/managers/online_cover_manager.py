@@ -0,0 +1,39 @@
+# online_cover_manager.py
+#
+# Copyright 2024 kramo
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+from cartridges.game import Game
+from cartridges.store.managers.cover_manager import CoverManager
+
+
+class OnlineCoverManager(CoverManager):
+    """
+    Manager in charge of downloading the cover image provided by a source
+
+    Runs during background enrichment, local covers take priority over it.
+    """
+
+    image_keys = ("online_cover_url",)
+
+    # Downloads are network bound
+    max_workers = 4
+
+    def main(self, game: Game, additional_data: dict) -> None:
+        if game.get_cover_path():
+            return
+        super().main(game, additional_data)
@@ -25,6 +25,7 @@ from cartridges.errors.friendly_error import FriendlyError
 from cartridges.game import Game
 from cartridges.store.managers.async_manager import AsyncManager
 from cartridges.store.managers.cover_manager import CoverManager
+from cartridges.store.managers.online_cover_manager import OnlineCoverManager
 from cartridges.store.managers.steam_api_manager import SteamAPIManager
 from cartridges.utils.steamgriddb import SgdbAuthError, SgdbHelper
 
@@ -32,8 +33,9 @@ from cartridges.utils.steamgriddb import SgdbAuthError, SgdbHelper
 class SgdbManager(AsyncManager):
     """Manager in charge of downloading a game's cover from SteamGridDB"""
 
-    run_after = (SteamAPIManager, CoverManager)
+    run_after = (SteamAPIManager, CoverManager, OnlineCoverManager)
     retryable_on = (HTTPError, SSLError, ConnectionError, JSONDecodeError)
+    max_workers = 4
 
     def main(self, game: Game, _additional_data: dict) -> None:
         try:
@@ -34,6 +34,10 @@ class SteamAPIManager(AsyncManager):
     """Manager in charge of completing a game's data from the Steam API"""
 
     retryable_on = (HTTPError, SSLError, Urllib3ConnectionError)
+    uses_additional_data = True
+
+    # Requests are rate limited, more workers would only wait for a token
+    max_workers = 2
 
     steam_api_helper: SteamAPIHelper = None
     steam_rate_limiter: SteamRateLimiter = None
@@ -18,7 +18,7 @@
 # SPDX-License-Identifier: GPL-3.0-or-later
 
 import logging
-from typing import Iterable
+from typing import Iterable, Mapping
 
 from gi.repository import GObject
 
@@ -27,7 +27,13 @@ from cartridges.store.managers.manager import Manager
 
 
 class Pipeline(GObject.Object):
-    """Class representing a set of managers for a game"""
+    """
+    Class representing a set of managers for a game
+
+    The managers' dependencies are compiled once by the store,
+    a pipeline only counts down the dependencies left for each manager.
+    The additional data is dropped once the managers using it are done.
+    """
 
     game: Game
     additional_data: dict
@@ -36,15 +42,34 @@ class Pipeline(GObject.Object):
     running: set[Manager]
     done: set[Manager]
 
+    dependents: Mapping[Manager, Iterable[Manager]]
+    n_dependencies: dict[Manager, int]
+    ready_managers: set[Manager]
+    n_data_users: int
+
     def __init__(
-        self, game: Game, additional_data: dict, managers: Iterable[Manager]
+        self,
+        game: Game,
+        additional_data: dict,
+        dependents: Mapping[Manager, Iterable[Manager]],
+        n_dependencies: Mapping[Manager, int],
     ) -> None:
         super().__init__()
         self.game = game
         self.additional_data = additional_data
-        self.waiting = set(managers)
+        self.dependents = dependents
+        self.n_dependencies = dict(n_dependencies)
+        self.waiting = set(n_dependencies)
         self.running = set()
         self.done = set()
+        self.ready_managers = {
+            manager for manager, count in n_dependencies.items() if not count
+        }
+        self.n_data_users = sum(
+            manager.uses_additional_data for manager in n_dependencies
+        )
+        if not self.n_data_users:
+            self.additional_data = {}
 
     @property
     def not_done(self) -> set[Manager]:
@@ -58,19 +83,12 @@ class Pipeline(GObject.Object):
     @property
     def blocked(self) -> set[Manager]:
         """Get the managers that cannot run because their dependencies aren't done"""
-        blocked = set()
-        for waiting in self.waiting:
-            for not_done in self.not_done:
-                if waiting == not_done:
-                    continue
-                if type(not_done) in waiting.run_after:
-                    blocked.add(waiting)
-        return blocked
+        return self.waiting - self.ready_managers
 
     @property
     def ready(self) -> set[Manager]:
         """Get the managers that can be run"""
-        return self.waiting - self.blocked
+        return set(self.ready_managers)
 
     @property
     def progress(self) -> float:
@@ -87,7 +105,7 @@ class Pipeline(GObject.Object):
         """Spawn tasks for managers that are able to run for a game"""
 
         # Separate blocking / async managers
-        managers = self.ready
+        managers, self.ready_managers = self.ready_managers, set()
         blocking = set(filter(lambda manager: manager.blocking, managers))
         parallel = managers - blocking
 
@@ -97,11 +115,24 @@ class Pipeline(GObject.Object):
             self.running.add(manager)
             manager.process_game(self.game, self.additional_data, self.manager_callback)
 
+    def cancel(self) -> None:
+        """Don't run the managers that didn't start, the running ones finish"""
+        self.waiting.clear()
+        self.ready_managers.clear()
+
     def manager_callback(self, manager: Manager) -> None:
         """Method called by a manager when it's done"""
         logging.debug("%s done for %s", manager.name, self.game.game_id)
         self.running.remove(manager)
         self.done.add(manager)
+        if manager.uses_additional_data:
+            self.n_data_users -= 1
+            if not self.n_data_users:
+                self.additional_data = {}
+        for dependent in self.dependents[manager]:
+            self.n_dependencies[dependent] -= 1
+            if not self.n_dependencies[dependent] and dependent in self.waiting:
+                self.ready_managers.add(dependent)
         self.emit("advanced")
         self.advance()
 
@@ -0,0 +1,65 @@
+# search_index.py
+#
+# Copyright 2024 kramo
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+from typing import TYPE_CHECKING, Optional
+
+if TYPE_CHECKING:
+    from cartridges.game import Game
+
+
+def normalize(text: str) -> str:
+    """Get the form of a text used to compare it in searches"""
+    return text.casefold()
+
+
+class SearchIndex:
+    """
+    Pre-normalized search keys of the games.
+
+    Keys are computed when a game is indexed, so filtering the library
+    on a keystroke only compares the normalized query against them.
+    """
+
+    # Separates the fields of a key, queries can't contain it
+    separator = "\n"
+
+    keys: dict[str, str]
+    sources: dict[str, str]
+
+    def __init__(self) -> None:
+        self.keys = {}
+        self.sources = {}
+
+    def update(self, game: "Game") -> None:
+        """Add or refresh the search keys of a game"""
+        self.keys[game.game_id] = normalize(
+            f"{game.name}{self.separator}{game.developer or ''}"
+        )
+        self.sources[game.game_id] = game.base_source
+
+    def matches(self, game_id: str, query: str, source: Optional[str] = None) -> bool:
+        """
+        Check if a game matches a search.
+
+        `query` must be normalized, it is matched against the name and developer.
+        If `source` is given, the game must also come from it.
+        """
+        if source is not None and self.sources.get(game_id) != source:
+            return False
+        return not query or query in self.keys.get(game_id, "")
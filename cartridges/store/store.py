@@ -18,12 +18,19 @@
 # SPDX-License-Identifier: GPL-3.0-or-later
 
 import logging
-from typing import Any, Generator, MutableMapping, Optional
+from typing import Any, Container, Generator, Iterable, Optional
+
+from gi.repository import GLib
 
 from cartridges import shared
 from cartridges.game import Game
+from cartridges.store.database import get_library_database
+from cartridges.store.enrichment_queue import EnrichmentQueue
+from cartridges.store.library_index import LibraryIndex
+from cartridges.store.managers.async_manager import AsyncManager
 from cartridges.store.managers.manager import Manager
 from cartridges.store.pipeline import Pipeline
+from cartridges.store.search_index import SearchIndex
 
 
 class Store:
@@ -31,43 +38,63 @@ class Store:
 
     managers: dict[type[Manager], Manager]
     pipeline_managers: set[Manager]
+    manager_order: list[type[Manager]]
+    manager_dependents: dict[type[Manager], list[type[Manager]]]
+    pipeline_dependents: dict[Manager, tuple[Manager, ...]]
+    pipeline_n_dependencies: dict[Manager, int]
     pipelines: dict[str, Pipeline]
-    source_games: MutableMapping[str, MutableMapping[str, Game]]
+    library_index: LibraryIndex
+    search_index: SearchIndex
+    enrichment_queue: EnrichmentQueue
     new_game_ids: set[str]
     duplicate_game_ids: set[str]
 
+    # Game flags that get their own secondary index
+    indexed_flags = ("hidden", "removed", "blacklisted")
+
     def __init__(self) -> None:
         self.managers = {}
         self.pipeline_managers = set()
+        self.manager_order = []
+        self.manager_dependents = {}
+        self.pipeline_dependents = {}
+        self.pipeline_n_dependencies = {}
         self.pipelines = {}
-        self.source_games = {}
+        self.library_index = LibraryIndex(self.indexed_flags)
+        self.search_index = SearchIndex()
+        self.enrichment_queue = EnrichmentQueue(self)
         self.new_game_ids = set()
         self.duplicate_game_ids = set()
 
+    @property
+    def games(self) -> dict[str, Game]:
+        return self.library_index.games
+
+    @property
+    def source_games(self) -> dict[str, dict[str, Game]]:
+        return self.library_index.source_games
+
     def __contains__(self, obj: object) -> bool:
         """Check if the game is present in the store with the `in` keyword"""
         if not isinstance(obj, Game):
             return False
-        if not (source_mapping := self.source_games.get(obj.base_source)):
-            return False
-        return obj.game_id in source_mapping
+        return obj.game_id in self.games
 
     def __iter__(self) -> Generator[Game, None, None]:
         """Iterate through the games in the store with `for ... in`"""
-        for _source_id, games_mapping in self.source_games.items():
-            for _game_id, game in games_mapping.items():
-                yield game
+        # Iterate on a copy, games may be added from import threads meanwhile
+        yield from tuple(self.games.values())
 
     def __len__(self) -> int:
         """Get the number of games in the store with the `len` builtin"""
-        return sum(len(source_mapping) for source_mapping in self.source_games.values())
+        return len(self.games)
 
     def __getitem__(self, game_id: str) -> Game:
         """Get a game by its id with `store["game_id_goes_here"]`"""
-        for game in iter(self):
-            if game.game_id == game_id:
-                return game
-        raise KeyError("Game not found in store")
+        try:
+            return self.games[game_id]
+        except KeyError as error:
+            raise KeyError("Game not found in store") from error
 
     def get(self, game_id: str, default: Any = None) -> Game | Any:
         """Get a game by its ID, with a fallback if not found"""
@@ -77,11 +104,107 @@ class Store:
         except KeyError:
             return default
 
-    def add_manager(self, manager: Manager, in_pipeline: bool = True) -> None:
-        """Add a manager to the store"""
+    def games_without_flag(
+        self, flag: str, source_id: Optional[str] = None
+    ) -> list[Game]:
+        """Get the games that don't have the given flag set, optionally of a source"""
+        return self.library_index.games_without_flag(flag, source_id)
+
+    def index_game(self, game: Game) -> None:
+        """Add or replace a game in the store indexes"""
+        self.library_index.add(game)
+        self.search_index.update(game)
+
+    def update_flag_indexes(self, game: Game) -> None:
+        """Update the flag indexes and source counts after a game's flags changed"""
+        self.library_index.update_flags(game)
+
+    def get_source_count(self, source_id: str, state: str = "visible") -> int:
+        """Get the number of games of a source in a state"""
+        return self.library_index.get_source_count(source_id, state)
+
+    def get_total_count(self, state: str = "visible") -> int:
+        """Get the number of games of all sources in a state"""
+        return self.library_index.get_total_count(state)
+
+    def take_changed_sources(self) -> set[str]:
+        """Get the sources whose counts changed since the last call"""
+        return self.library_index.take_changed_sources()
+
+    def set_game_priorities(self, priorities: dict[str, int]) -> None:
+        """
+        Set the priorities of games by ID in the managers' queues.
+
+        Games with a higher priority are processed first, games not given
+        one are processed in turn after them.
+        """
+        for manager in self.managers.values():
+            if isinstance(manager, AsyncManager):
+                manager.set_priorities(priorities)
+
+    def add_manager(
+        self, manager: Manager, in_pipeline: bool = True, in_enrichment: bool = False
+    ) -> None:
+        """
+        Add a manager to the store
+
+        Managers in enrichment run on the imported games in the background,
+        see `EnrichmentQueue`.
+        Raise a ValueError if its `run_after` dependencies make a cycle.
+        """
         manager_type = type(manager)
+        manager_types = [*self.managers, manager_type]
+        self.manager_order, self.manager_dependents = self.compile_managers(
+            manager_types
+        )
         self.managers[manager_type] = manager
         self.toggle_manager_in_pipelines(manager_type, in_pipeline)
+        if in_enrichment:
+            self.enrichment_queue.add_manager(manager)
+
+    @staticmethod
+    def compile_managers(
+        manager_types: Iterable[type[Manager]],
+    ) -> tuple[list[type[Manager]], dict[type[Manager], list[type[Manager]]]]:
+        """
+        Compile the `run_after` declarations of managers into a dependency graph.
+        Return the managers in a topological order, and the dependents of each.
+        """
+        manager_types = list(manager_types)
+        dependents = {manager_type: [] for manager_type in manager_types}
+        n_dependencies = dict.fromkeys(manager_types, 0)
+        for manager_type in manager_types:
+            for dependency in manager_types:
+                if (
+                    dependency is not manager_type
+                    and dependency in manager_type.run_after
+                ):
+                    dependents[dependency].append(manager_type)
+                    n_dependencies[manager_type] += 1
+
+        order = []
+        ready = [
+            manager_type
+            for manager_type in manager_types
+            if not n_dependencies[manager_type]
+        ]
+        while ready:
+            manager_type = ready.pop(0)
+            order.append(manager_type)
+            for dependent in dependents[manager_type]:
+                n_dependencies[dependent] -= 1
+                if not n_dependencies[dependent]:
+                    ready.append(dependent)
+
+        if len(order) != len(manager_types):
+            cycle = ", ".join(
+                manager_type.__name__
+                for manager_type in manager_types
+                if manager_type not in order
+            )
+            raise ValueError(f"Dependency cycle between managers: {cycle}")
+
+        return order, dependents
 
     def toggle_manager_in_pipelines(
         self, manager_type: type[Manager], enable: bool
@@ -92,6 +215,32 @@ class Store:
         else:
             self.pipeline_managers.discard(self.managers[manager_type])
 
+        self.pipeline_dependents, self.pipeline_n_dependencies = self.get_pipeline_plan(
+            self.pipeline_managers
+        )
+
+    def get_pipeline_plan(
+        self, managers: Container[Manager]
+    ) -> tuple[dict[Manager, tuple[Manager, ...]], dict[Manager, int]]:
+        """
+        Restrict the dependency graph to some managers.
+        Return the dependents of each manager and its number of dependencies.
+        """
+        dependents = {}
+        n_dependencies = {}
+        for manager_type in self.manager_order:
+            if (manager := self.managers[manager_type]) not in managers:
+                continue
+            n_dependencies.setdefault(manager, 0)
+            dependents[manager] = tuple(
+                self.managers[dependent]
+                for dependent in self.manager_dependents[manager_type]
+                if self.managers[dependent] in managers
+            )
+            for dependent in dependents[manager]:
+                n_dependencies[dependent] = n_dependencies.get(dependent, 0) + 1
+        return dependents, n_dependencies
+
     def cleanup_game(self, game: Game) -> None:
         """Remove a game's files, dismiss any loose toasts"""
         for path in (
@@ -100,6 +249,8 @@ class Store:
             shared.covers_dir / f"{game.game_id}.gif",
         ):
             path.unlink(missing_ok=True)
+        if database := get_library_database():
+            database.delete(game.game_id)
 
         # TODO: don't run this if the state is startup
         for undo in ("remove", "hide"):
@@ -150,14 +301,34 @@ class Store:
                 game.connect(signal, manager.run)
 
         # Add the game to the store
-        if not game.base_source in self.source_games:
-            self.source_games[game.base_source] = {}
-        self.source_games[game.base_source][game.game_id] = game
+        self.index_game(game)
 
         # Run the pipeline for the game
         if not run_pipeline:
             return None
-        pipeline = Pipeline(game, additional_data, self.pipeline_managers)
+        pipeline = Pipeline(
+            game,
+            additional_data,
+            self.pipeline_dependents,
+            self.pipeline_n_dependencies,
+        )
         self.pipelines[game.game_id] = pipeline
-        pipeline.advance()
+        pipeline.connect("advanced", self.pipeline_advanced)
+        if GLib.MainContext.default().is_owner():
+            self.start_pipeline(pipeline)
+        else:
+            # Blocking managers touch the UI, start from the main loop
+            GLib.idle_add(self.start_pipeline, pipeline)
         return pipeline
+
+    def start_pipeline(self, pipeline: Pipeline) -> None:
+        pipeline.advance()
+        self.pipeline_advanced(pipeline)
+
+    def pipeline_advanced(self, pipeline: Pipeline) -> None:
+        """Release a pipeline once it is done"""
+        if not pipeline.is_done:
+            return
+        game_id = pipeline.game.game_id
+        if self.pipelines.get(game_id) is pipeline:
+            del self.pipelines[game_id]
@@ -0,0 +1,90 @@
+# frame_timer.py
+#
+# Copyright 2024 kramo
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+import logging
+import os
+from typing import Any, Optional
+
+from gi.repository import Gdk, Gtk
+
+
+class FrameTimer:
+    """
+    Measure the time between the frames of a widget.
+
+    Frames are requested continuously while measuring,
+    so a busy main loop shows up as long frames.
+    This keeps redrawing the window, so it only measures when
+    the environment variable `CARTRIDGES_PROFILE` is set.
+    """
+
+    enabled: bool = bool(os.environ.get("CARTRIDGES_PROFILE"))
+
+    # Frames longer than this are counted as dropped, in µs
+    slow_frame_time = 1_000_000 // 30
+
+    widget: Gtk.Widget
+    frame_clock: Optional[Gdk.FrameClock] = None
+    handler_id: int = 0
+    last_frame_time: int = 0
+    frame_times: list[int]
+
+    def __init__(self, widget: Gtk.Widget) -> None:
+        self.widget = widget
+        self.frame_times = []
+
+    def start(self) -> None:
+        if not self.enabled or self.handler_id:
+            return
+        if not (frame_clock := self.widget.get_frame_clock()):
+            return
+
+        self.frame_times = []
+        self.last_frame_time = 0
+        self.frame_clock = frame_clock
+        self.handler_id = frame_clock.connect("update", self.__update)
+        frame_clock.begin_updating()
+
+    def stop(self, label: str) -> None:
+        """Stop measuring and log the frame times"""
+        if not self.handler_id:
+            return
+
+        self.frame_clock.disconnect(self.handler_id)  # type: ignore
+        self.frame_clock.end_updating()  # type: ignore
+        self.handler_id = 0
+
+        if not (frame_times := self.frame_times):
+            return
+
+        logging.info(
+            "%s: %d frames, mean %.1f ms, max %.1f ms, %d over %d ms",
+            label,
+            len(frame_times),
+            sum(frame_times) / len(frame_times) / 1000,
+            max(frame_times) / 1000,
+            sum(frame_time > self.slow_frame_time for frame_time in frame_times),
+            self.slow_frame_time // 1000,
+        )
+
+    def __update(self, frame_clock: Gdk.FrameClock, *_args: Any) -> None:
+        frame_time = frame_clock.get_frame_time()
+        if self.last_frame_time:
+            self.frame_times.append(frame_time - self.last_frame_time)
+        self.last_frame_time = frame_time
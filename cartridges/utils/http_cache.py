@@ -0,0 +1,324 @@
+# http_cache.py
+#
+# Copyright 2024 kramo
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+import json
+import logging
+import os
+import re
+from collections import Counter, OrderedDict
+from email.utils import parsedate_to_datetime
+from hashlib import sha256
+from pathlib import Path
+from threading import Event, Lock
+from time import time
+from typing import Any, Callable, Optional
+
+import requests
+from requests.structures import CaseInsensitiveDict
+from requests.utils import get_encoding_from_headers
+
+from cartridges.utils.write_atomically import write_atomically
+
+
+class Flight:
+    """A request in progress, that identical requests wait for"""
+
+    event: Event
+    response: Optional[requests.Response] = None
+    error: Optional[Exception] = None
+
+    def __init__(self) -> None:
+        self.event = Event()
+
+    def wait(self) -> requests.Response:
+        self.event.wait()
+        if self.error:
+            raise self.error
+        return self.response  # type: ignore
+
+
+class HTTPCache:
+    """
+    On-disk cache of HTTP responses, safe to use from any thread.
+
+    Successful responses are stored with their validators (ETag, Last-Modified).
+    Fresh responses are served from disk, stale ones are revalidated
+    with a conditional request. The cache is kept under a size budget by
+    evicting the least recently used responses.
+    Identical requests made at the same time are merged into one.
+    """
+
+    # Size budget of the stored bodies, in bytes
+    max_size: int = 256 * 1024 * 1024
+
+    # Bodies larger than this are not stored
+    max_entry_size: int = 16 * 1024 * 1024
+
+    # Response headers kept with the bodies
+    kept_headers = ("content-type", "etag", "last-modified", "cache-control")
+
+    path: Path
+    lock: Lock
+    # Metadata of the stored responses by key, least recently used first
+    entries: Optional[OrderedDict[str, dict[str, Any]]] = None
+    size: int = 0
+    flights: dict[str, Flight]
+    counts: Counter[str]
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        self.lock = Lock()
+        self.flights = {}
+        self.counts = Counter()
+
+    def get(
+        self,
+        fetch: Callable[..., requests.Response],
+        url: str,
+        max_age: Optional[float] = None,
+        **kwargs: Any,
+    ) -> requests.Response:
+        """
+        Make a GET request through the cache, `fetch` makes the actual request.
+
+        `max_age` is how long in seconds a response stays fresh
+        when the server doesn't tell.
+        """
+        key = self.get_key(url, kwargs.get("headers"))
+
+        with self.lock:
+            if not (leader := key not in self.flights):
+                self.counts["merged"] += 1
+                flight = self.flights[key]
+            else:
+                flight = self.flights[key] = Flight()
+        if not leader:
+            return flight.wait()
+
+        try:
+            flight.response = self.__get(fetch, key, url, max_age, kwargs)
+        except Exception as error:
+            flight.error = error
+            raise
+        finally:
+            with self.lock:
+                del self.flights[key]
+            flight.event.set()
+        return flight.response
+
+    def get_key(self, url: str, headers: Optional[dict[str, str]]) -> str:
+        """Get the cache key of a request, responses differ by credentials"""
+        authorization = (headers or {}).get("Authorization", "")
+        return sha256(f"{url}\n{authorization}".encode("utf-8")).hexdigest()
+
+    def __get(
+        self,
+        fetch: Callable[..., requests.Response],
+        key: str,
+        url: str,
+        max_age: Optional[float],
+        kwargs: dict[str, Any],
+    ) -> requests.Response:
+        entry = self.lookup(key)
+        body = self.read_body(key) if entry else None
+
+        if entry and body is not None:
+            if time() < entry["fetched"] + entry["max_age"]:
+                self.count("hits")
+                return self.build_response(url, entry, body)
+
+            conditions = {}
+            if etag := entry["headers"].get("etag"):
+                conditions["If-None-Match"] = etag
+            if last_modified := entry["headers"].get("last-modified"):
+                conditions["If-Modified-Since"] = last_modified
+            if conditions:
+                kwargs["headers"] = {**kwargs.get("headers", {}), **conditions}
+
+        response = fetch(url, **kwargs)
+
+        if response.status_code == 304 and entry and body is not None:
+            self.count("revalidated")
+            entry["fetched"] = time()
+            entry["max_age"] = self.get_max_age(response.headers, max_age)
+            try:
+                self.write_meta(key, entry)
+            except OSError as error:
+                logging.warning("Couldn't update the cache of %s", url, exc_info=error)
+            return self.build_response(url, entry, body)
+
+        # Read the body, so the response can be shared with merged requests
+        response.content  # pylint: disable=pointless-statement
+
+        self.count("misses")
+        if response.status_code == 200:
+            self.store(key, url, response, max_age)
+        return response
+
+    def lookup(self, key: str) -> Optional[dict[str, Any]]:
+        """Get the metadata of a stored response and mark it as used"""
+        with self.lock:
+            entries = self.load_entries()
+            if (entry := entries.get(key)) is not None:
+                entries.move_to_end(key)
+            return entry
+
+    def load_entries(self) -> OrderedDict[str, dict[str, Any]]:
+        """Load the metadata of the stored responses, the lock must be held"""
+        if self.entries is not None:
+            return self.entries
+
+        entries = []
+        for meta_path in self.path.glob("*.json"):
+            try:
+                entry = json.loads(meta_path.read_text("utf-8"))
+                used = meta_path.with_suffix("").stat().st_mtime
+            except (OSError, ValueError):
+                meta_path.unlink(missing_ok=True)
+                continue
+            entries.append((used, meta_path.stem, entry))
+
+        entries.sort(key=lambda item: item[0])
+        self.entries = OrderedDict((key, entry) for _used, key, entry in entries)
+        self.size = sum(entry["size"] for entry in self.entries.values())
+        return self.entries
+
+    def read_body(self, key: str) -> Optional[bytes]:
+        """Read a stored body, marking it as recently used on disk"""
+        body_path = self.path / key
+        try:
+            body = body_path.read_bytes()
+            os.utime(body_path)
+        except OSError:
+            self.remove(key)
+            return None
+        return body
+
+    def get_max_age(
+        self, headers: CaseInsensitiveDict, default: Optional[float] = None
+    ) -> float:
+        """Get how long a response stays fresh, in seconds"""
+        cache_control = headers.get("cache-control", "").lower()
+        if "no-cache" in cache_control or "no-store" in cache_control:
+            return 0
+        if match := re.search(r"max-age=(\d+)", cache_control):
+            return int(match.group(1))
+        if default is not None:
+            return default
+
+        # Heuristic freshness, a tenth of the time since the last change
+        try:
+            last_modified = parsedate_to_datetime(headers["last-modified"])
+        except (KeyError, TypeError, ValueError):
+            return 0
+        return max(0, (time() - last_modified.timestamp()) / 10)
+
+    def store(
+        self,
+        key: str,
+        url: str,
+        response: requests.Response,
+        max_age: Optional[float],
+    ) -> None:
+        """Store a response if it can be reused"""
+        if "no-store" in response.headers.get("cache-control", "").lower():
+            return
+
+        headers = {
+            name: value
+            for name in self.kept_headers
+            if (value := response.headers.get(name))
+        }
+        entry = {
+            "url": url,
+            "headers": headers,
+            "fetched": time(),
+            "max_age": self.get_max_age(response.headers, max_age),
+            "size": len(response.content),
+        }
+        if not (entry["max_age"] or "etag" in headers or "last-modified" in headers):
+            return
+        if entry["size"] > self.max_entry_size:
+            return
+
+        try:
+            self.path.mkdir(parents=True, exist_ok=True)
+            write_atomically(self.path / key, response.content)
+            self.write_meta(key, entry)
+        except OSError as error:
+            logging.warning("Couldn't cache %s", url, exc_info=error)
+            return
+
+        with self.lock:
+            entries = self.load_entries()
+            if previous := entries.pop(key, None):
+                self.size -= previous["size"]
+            entries[key] = entry
+            self.size += entry["size"]
+            self.evict()
+
+    def write_meta(self, key: str, entry: dict[str, Any]) -> None:
+        write_atomically(self.path / f"{key}.json", json.dumps(entry))
+
+    def evict(self) -> None:
+        """Remove the least recently used responses over budget, the lock must be held"""
+        while self.size > self.max_size and self.entries:
+            key, entry = self.entries.popitem(last=False)
+            self.size -= entry["size"]
+            self.counts["evictions"] += 1
+            self.unlink(key)
+
+    def remove(self, key: str) -> None:
+        with self.lock:
+            if self.entries is not None and (entry := self.entries.pop(key, None)):
+                self.size -= entry["size"]
+        self.unlink(key)
+
+    def unlink(self, key: str) -> None:
+        (self.path / f"{key}.json").unlink(missing_ok=True)
+        (self.path / key).unlink(missing_ok=True)
+
+    def build_response(
+        self, url: str, entry: dict[str, Any], body: bytes
+    ) -> requests.Response:
+        """Create a response from a stored one"""
+        response = requests.Response()
+        response.status_code = 200
+        response.reason = "OK"
+        response.url = url
+        response.headers = CaseInsensitiveDict(entry["headers"])
+        response.encoding = get_encoding_from_headers(response.headers)
+        # pylint: disable=protected-access
+        response._content = body
+        response._content_consumed = True
+        return response
+
+    def count(self, name: str) -> None:
+        with self.lock:
+            self.counts[name] += 1
+
+    @property
+    def stats(self) -> dict[str, int]:
+        """Get the hits, revalidations, misses, merged requests and evictions"""
+        with self.lock:
+            return dict(self.counts)
+
+    def reset_stats(self) -> None:
+        with self.lock:
+            self.counts.clear()
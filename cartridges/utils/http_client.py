@@ -0,0 +1,150 @@
+# http_client.py
+#
+# Copyright 2024 kramo
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+import logging
+from collections import Counter
+from functools import partial
+from threading import Lock
+from typing import Any, Optional
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util import Retry
+
+from cartridges import shared
+from cartridges.utils.http_cache import HTTPCache
+from cartridges.utils.rate_limiter import RateLimiter
+
+
+class HTTPClient:
+    """
+    HTTP client shared by all the network helpers, safe to use from any thread.
+
+    Connections are kept alive in a pool per host, so repeated requests
+    skip the TCP and TLS handshakes. Requests share a timeout and a retry
+    policy for failed connections, and are counted per host.
+    Responses are cached on disk, see `HTTPCache`.
+    """
+
+    # Seconds to wait for a connection and between bytes of a response
+    timeout: float = 5
+
+    # Connections kept alive per host, matching the workers that use them
+    default_pool_size: int = 4
+    host_pool_sizes: dict[str, int] = {
+        "store.steampowered.com": 2,
+        "www.steamgriddb.com": 4,
+        "cdn2.steamgriddb.com": 4,
+    }
+
+    # Only retry requests that couldn't reach the host here,
+    # managers retry the other errors with their own backoff
+    max_retries = Retry(
+        total=2,
+        connect=2,
+        read=0,
+        status=0,
+        other=0,
+        backoff_factor=0.5,
+        allowed_methods=frozenset({"GET", "HEAD"}),
+    )
+
+    session: requests.Session
+    cache: HTTPCache
+    host_counts: Counter[str]
+    counts_lock: Lock
+
+    def __init__(self) -> None:
+        self.session = requests.Session()
+        self.session.mount("https://", self.__create_adapter(self.default_pool_size))
+        self.session.mount("http://", self.__create_adapter(self.default_pool_size))
+        for host, pool_size in self.host_pool_sizes.items():
+            self.session.mount(f"https://{host}/", self.__create_adapter(pool_size))
+
+        self.cache = HTTPCache(shared.http_cache_dir)
+        self.host_counts = Counter()
+        self.counts_lock = Lock()
+
+    def __create_adapter(self, pool_size: int) -> HTTPAdapter:
+        return HTTPAdapter(
+            pool_maxsize=pool_size,
+            pool_block=True,
+            max_retries=self.max_retries,
+        )
+
+    def get(
+        self,
+        url: str,
+        max_age: Optional[float] = None,
+        rate_limiter: Optional[RateLimiter] = None,
+        **kwargs: Any,
+    ) -> requests.Response:
+        """
+        Make a GET request through the cache.
+
+        `max_age` is how long in seconds the response stays fresh
+        if the server doesn't tell. A token of `rate_limiter` is only taken
+        when the request goes to the network, not for fresh cached responses.
+        Other arguments are passed to `requests.Session.get`.
+        """
+        kwargs.setdefault("timeout", self.timeout)
+        fetch = self.fetch
+        if rate_limiter is not None:
+            fetch = partial(self.fetch_limited, rate_limiter)
+        return self.cache.get(fetch, url, max_age, **kwargs)
+
+    def fetch(self, url: str, **kwargs: Any) -> requests.Response:
+        """Make a GET request on the network"""
+        with self.counts_lock:
+            self.host_counts[urlsplit(url).hostname or ""] += 1
+        return self.session.get(url, **kwargs)
+
+    def fetch_limited(
+        self, rate_limiter: RateLimiter, url: str, **kwargs: Any
+    ) -> requests.Response:
+        """Make a GET request on the network once the rate limiter allows it"""
+        with rate_limiter:
+            return self.fetch(url, **kwargs)
+
+    @property
+    def stats(self) -> dict[str, int]:
+        """Get the number of requests made to each host"""
+        with self.counts_lock:
+            return dict(self.host_counts)
+
+    def reset_stats(self) -> None:
+        with self.counts_lock:
+            self.host_counts.clear()
+        self.cache.reset_stats()
+
+    def log_stats(self) -> None:
+        """Log the number of requests made to each host and the cache use"""
+        for host, count in sorted(self.stats.items()):
+            logging.info("HTTP: %d requests to %s", count, host)
+        if cache_stats := self.cache.stats:
+            logging.info(
+                "HTTP cache: %s",
+                ", ".join(
+                    f"{count} {name}" for name, count in sorted(cache_stats.items())
+                ),
+            )
+
+
+http_client = HTTPClient()
@@ -17,41 +17,64 @@
 #
 # SPDX-License-Identifier: GPL-3.0-or-later
 
+import json
 from collections import deque
 from contextlib import AbstractContextManager
-from threading import BoundedSemaphore, Lock, Thread
-from time import sleep, time
-from typing import Any, Sized
+from math import ceil
+from threading import Condition, Lock
+from time import monotonic, time
+from typing import Any, Callable, Optional, Sized
 
 
 class PickHistory(Sized):
     """Utility class used for rate limiters, counting how many picks
-    happened in a given period"""
+    happened in a given period
+
+    Picks are kept in order on the monotonic clock,
+    old ones are dropped from the front of the window as it slides."""
 
     period: int
+    clock: Callable[[], float]
+    wall_clock: Callable[[], float]
 
-    timestamps: list[float]
+    timestamps: deque[float]
     timestamps_lock: Lock
 
-    def __init__(self, period: int) -> None:
+    def __init__(
+        self,
+        period: int,
+        clock: Callable[[], float] = monotonic,
+        wall_clock: Callable[[], float] = time,
+    ) -> None:
         self.period = period
-        self.timestamps = []
+        self.clock = clock
+        self.wall_clock = wall_clock
+        self.timestamps = deque()
         self.timestamps_lock = Lock()
 
-    def remove_old_entries(self) -> None:
+    def remove_old_entries(self, now: Optional[float] = None) -> None:
         """Remove history entries older than the period"""
-        now = time()
-        cutoff = now - self.period
+        cutoff = (self.clock() if now is None else now) - self.period
         with self.timestamps_lock:
-            self.timestamps = [entry for entry in self.timestamps if entry > cutoff]
+            while self.timestamps and self.timestamps[0] <= cutoff:
+                self.timestamps.popleft()
 
     def add(self, *new_timestamps: float) -> None:
-        """Add timestamps to the history.
-        If none given, will add the current timestamp"""
+        """Add picks to the history, at the given wall clock timestamps.
+        If none given, will add a pick now"""
         if len(new_timestamps) == 0:
-            new_timestamps = (time(),)
+            with self.timestamps_lock:
+                self.timestamps.append(self.clock())
+            return
+
+        # Convert from the wall clock, the monotonic one doesn't survive restarts
+        offset = self.clock() - self.wall_clock()
         with self.timestamps_lock:
-            self.timestamps.extend(new_timestamps)
+            self.timestamps = deque(
+                sorted(
+                    (*self.timestamps, *(entry + offset for entry in new_timestamps))
+                )
+            )
 
     def __len__(self) -> int:
         """How many entries were logged in the period"""
@@ -61,23 +84,52 @@ class PickHistory(Sized):
 
     @property
     def start(self) -> float:
-        """Get the time at which the history started"""
+        """Get the monotonic time at which the history started"""
         self.remove_old_entries()
         with self.timestamps_lock:
-            try:
-                entry = self.timestamps[0]
-            except IndexError:
-                entry = time()
-        return entry
+            return self.timestamps[0] if self.timestamps else self.clock()
 
     def copy_timestamps(self) -> list[float]:
-        """Get a copy of the timestamps history"""
+        """Get a copy of the history as wall clock timestamps"""
         self.remove_old_entries()
+        offset = self.wall_clock() - self.clock()
         with self.timestamps_lock:
-            return self.timestamps.copy()
+            return [entry + offset for entry in self.timestamps]
+
+    def encode(self) -> str:
+        """
+        Encode the history compactly, as tenths of seconds since the previous pick.
+
+        The first pick is an absolute wall clock time. Times are rounded up,
+        so picks are never forgotten earlier than they should be.
+        """
+        values = []
+        previous = 0
+        for timestamp in self.copy_timestamps():
+            value = ceil(timestamp * 10)
+            values.append(str(value - previous))
+            previous = value
+        return ",".join(values)
+
+    def load(self, history_str: str) -> None:
+        """
+        Add the picks of an encoded history, also reading the JSON list
+        of older versions. Raise a ValueError or TypeError if it is invalid.
+        """
+        if history_str.startswith("["):
+            timestamps = [float(timestamp) for timestamp in json.loads(history_str)]
+        else:
+            timestamps = []
+            value = 0
+            for delta in filter(None, history_str.split(",")):
+                value += int(delta)
+                timestamps.append(value / 10)
+
+        if timestamps:
+            self.add(*timestamps)
+            self.remove_old_entries()
 
 
-# pylint: disable=too-many-instance-attributes
 class RateLimiter(AbstractContextManager):
     """
     Base rate limiter implementing the token bucket algorithm.
@@ -89,30 +141,28 @@ class RateLimiter(AbstractContextManager):
     * refill_period_seconds - Period in which we have a max amount of tokens
     * refill_period_tokens - Number of tokens allowed in this period
     * burst_tokens - Max number of tokens that can be consumed instantly
+
+    Tokens are refilled continuously, computed from the monotonic clock
+    when a token is asked for, and the picks in the last period are capped
+    by a sliding window. Waiters are served in arrival order, the first
+    one sleeps until the next token is due and the others until their turn.
+
+    The clocks can be given for tests, `clock` must be monotonic.
     """
 
     refill_period_seconds: int
     refill_period_tokens: int
     burst_tokens: int
 
+    clock: Callable[[], float]
+    wall_clock: Callable[[], float]
     pick_history: PickHistory
-    bucket: BoundedSemaphore
-    queue: deque[Lock]
-    queue_lock: Lock
+    lock: Lock
+    # Conditions of the waiting threads, in arrival order
+    queue: deque[Condition]
 
-    # Protect the number of tokens behind a lock
-    __n_tokens_lock: Lock
-    __n_tokens = 0
-
-    @property
-    def n_tokens(self) -> int:
-        with self.__n_tokens_lock:
-            return self.__n_tokens
-
-    @n_tokens.setter
-    def n_tokens(self, value: int) -> None:
-        with self.__n_tokens_lock:
-            self.__n_tokens = value
+    tokens: float
+    last_refill: float
 
     def _init_pick_history(self) -> None:
         """
@@ -122,95 +172,97 @@ class RateLimiter(AbstractContextManager):
         By default, creates an empty pick history.
         Should be overriden or extended by subclasses.
         """
-        self.pick_history = PickHistory(self.refill_period_seconds)
-
-    def __init__(self) -> None:
+        self.pick_history = PickHistory(
+            self.refill_period_seconds, self.clock, self.wall_clock
+        )
+
+    def __init__(
+        self,
+        clock: Callable[[], float] = monotonic,
+        wall_clock: Callable[[], float] = time,
+    ) -> None:
         """Initialize the limiter"""
 
+        self.clock = clock
+        self.wall_clock = wall_clock
         self._init_pick_history()
 
-        # Create synchronization data
-        self.__n_tokens_lock = Lock()
-        self.queue_lock = Lock()
+        self.lock = Lock()
         self.queue = deque()
 
-        # Initialize the token bucket
-        self.bucket = BoundedSemaphore(self.burst_tokens)
-        self.n_tokens = self.burst_tokens
+        # Initialize the token bucket, spending the picks of a loaded history
+        self.replay_history()
 
-        # Spawn daemon thread that refills the bucket
-        refill_thread = Thread(target=self.refill_thread_func, daemon=True)
-        refill_thread.start()
+    def replay_history(self) -> None:
+        """Fill the bucket as it would be after the picks in the history"""
+        now = self.clock()
+        self.pick_history.remove_old_entries(now)
+        with self.pick_history.timestamps_lock:
+            timestamps = list(self.pick_history.timestamps)
 
-    @property
-    def refill_spacing(self) -> float:
-        """
-        Get the current refill spacing.
+        self.tokens = self.burst_tokens
+        self.last_refill = timestamps[0] if timestamps else now
+        for timestamp in timestamps:
+            self.refill(timestamp)
+            self.tokens = max(0, self.tokens - 1)
+        self.refill(now)
 
-        Ensures that even with a burst in the period, the limit will not be exceeded.
-        """
+    @property
+    def refill_rate(self) -> float:
+        """Get the number of tokens added back per second"""
+        return self.refill_period_tokens / self.refill_period_seconds
 
-        # Compute ideal spacing
-        tokens_left = self.refill_period_tokens - len(self.pick_history)  # type: ignore
-        seconds_left = self.pick_history.start + self.refill_period_seconds - time()  # type: ignore
-        try:
-            spacing_seconds = seconds_left / tokens_left
-        except ZeroDivisionError:
-            # There were no remaining tokens, gotta wait until end of the period
-            spacing_seconds = seconds_left
-
-        # Prevent spacing dropping down lower than the natural spacing
-        natural_spacing = self.refill_period_seconds / self.refill_period_tokens
-        return max(natural_spacing, spacing_seconds)
-
-    def refill(self) -> None:
-        """Add a token back in the bucket"""
-        sleep(self.refill_spacing)
-        try:
-            self.bucket.release()
-        except ValueError:
-            # Bucket was full
-            pass
-        else:
-            self.n_tokens += 1
-
-    def refill_thread_func(self) -> None:
-        """Entry point for the daemon thread that is refilling the bucket"""
-        while True:
-            self.refill()
-
-    def update_queue(self) -> None:
-        """Update the queue, moving it forward if possible. Non-blocking."""
-        update_thread = Thread(target=self.queue_update_thread_func, daemon=True)
-        update_thread.start()
-
-    def queue_update_thread_func(self) -> None:
-        """Queue-updating thread's entry point"""
-        with self.queue_lock:
-            if len(self.queue) == 0:
-                return
-            # Not using with because we don't want to release to the bucket
-            self.bucket.acquire()  # pylint: disable=consider-using-with
-            self.n_tokens -= 1
-            lock = self.queue.pop()
-            lock.release()
-
-    def add_to_queue(self) -> Lock:
-        """Create a lock, add it to the queue and return it"""
-        lock = Lock()
-        # We want the lock locked until its turn in queue
-        lock.acquire()  # pylint: disable=consider-using-with
-        with self.queue_lock:
-            self.queue.appendleft(lock)
-        return lock
+    @property
+    def n_tokens(self) -> int:
+        """Get the number of tokens in the bucket"""
+        with self.lock:
+            self.refill(self.clock())
+            return int(self.tokens)
+
+    def refill(self, now: float) -> None:
+        """Add the tokens due since the last refill, the lock must be held"""
+        self.tokens = min(
+            self.burst_tokens,
+            self.tokens + (now - self.last_refill) * self.refill_rate,
+        )
+        self.last_refill = now
+
+    def get_delay(self, now: float) -> float:
+        """Get the seconds until a token can be picked, the lock must be held"""
+        self.refill(now)
+        delay = (1 - self.tokens) / self.refill_rate if self.tokens < 1 else 0
+
+        # Never exceed the limit of the period, even after a burst
+        self.pick_history.remove_old_entries(now)
+        if len(self.pick_history.timestamps) >= self.refill_period_tokens:
+            window_delay = (
+                self.pick_history.timestamps[0] + self.refill_period_seconds - now
+            )
+            delay = max(delay, window_delay)
+
+        return delay
 
     def acquire(self) -> None:
         """Acquires a token from the bucket when it's your turn in queue"""
-        lock = self.add_to_queue()
-        self.update_queue()
-        # Wait until our turn in queue
-        lock.acquire()  # pylint: disable=consider-using-with
-        self.pick_history.add()  # type: ignore
+        with self.lock:
+            turn = Condition(self.lock)
+            self.queue.append(turn)
+
+            # Wait until our turn in queue, then until a token is available
+            while self.queue[0] is not turn:
+                self.wait(turn)
+            while (delay := self.get_delay(self.clock())) > 0:
+                self.wait(turn, delay)
+
+            self.tokens -= 1
+            self.pick_history.add()
+            self.queue.popleft()
+            if self.queue:
+                self.queue[0].notify()
+
+    def wait(self, turn: Condition, timeout: Optional[float] = None) -> None:
+        """Wait until notified or for the timeout, the lock must be held"""
+        turn.wait(timeout)
 
     # --- Support for use in with statements
 
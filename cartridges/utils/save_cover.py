@@ -106,7 +106,21 @@ def save_cover(game_id: str, cover_path: Path) -> None:
         animated_path if cover_path.suffix == ".gif" else static_path,
     )
 
-    if game_id in shared.win.game_covers:
+    if game_id not in shared.win.game_covers:
+        return
+
+    if GLib.MainContext.default().is_owner():
         shared.win.game_covers[game_id].new_cover(
             animated_path if cover_path.suffix == ".gif" else static_path
         )
+        return
+
+    # Decode the texture in the worker thread, only hand it off to the main loop
+    if cover_path.suffix == ".gif":
+        GLib.idle_add(shared.win.game_covers[game_id].new_cover, animated_path)
+    else:
+        GLib.idle_add(
+            shared.win.game_covers[game_id].new_cover,
+            static_path,
+            Gdk.Texture.new_from_filename(str(static_path)),
+        )
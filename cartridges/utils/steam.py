@@ -21,14 +21,19 @@
 import json
 import logging
 import re
+import sqlite3
 from pathlib import Path
-from typing import TypedDict
+from threading import Lock
+from time import time
+from typing import Optional, TypedDict
 
-import requests
+from gi.repository import GLib
 from requests.exceptions import HTTPError
 
 from cartridges import shared
+from cartridges.utils.http_client import http_client
 from cartridges.utils.rate_limiter import RateLimiter
+from cartridges.utils.steam_appinfo import STEAM_GAME_TYPES
 
 
 class SteamError(Exception):
@@ -72,6 +77,16 @@ class SteamRateLimiter(RateLimiter):
     refill_period_tokens = 200
     burst_tokens = 100
 
+    # Delay in ms before new picks are written to the schema
+    save_delay: int = 5000
+
+    save_lock: Lock
+    save_source_id: int = 0
+
+    def __init__(self) -> None:
+        self.save_lock = Lock()
+        super().__init__()
+
     def _init_pick_history(self) -> None:
         """
         Load the pick history from schema.
@@ -79,15 +94,119 @@ class SteamRateLimiter(RateLimiter):
         Allows remembering API limits through restarts of Cartridges.
         """
         super()._init_pick_history()
-        timestamps_str = shared.state_schema.get_string("steam-limiter-tokens-history")
-        self.pick_history.add(*json.loads(timestamps_str))
-        self.pick_history.remove_old_entries()
+        history_str = shared.state_schema.get_string("steam-limiter-tokens-history")
+        try:
+            self.pick_history.load(history_str)
+        except (TypeError, ValueError):
+            logging.warning("Invalid Steam rate limiter history: %s", history_str)
 
     def acquire(self) -> None:
-        """Get a token from the bucket and store the pick history in the schema"""
+        """Get a token from the bucket and queue saving the pick history"""
         super().acquire()
-        timestamps_str = json.dumps(self.pick_history.copy_timestamps())
-        shared.state_schema.set_string("steam-limiter-tokens-history", timestamps_str)
+        with self.save_lock:
+            if not self.save_source_id:
+                # Picks are batched into one write from the main loop
+                self.save_source_id = GLib.timeout_add(
+                    self.save_delay, self.__save_timeout
+                )
+
+    def __save_timeout(self) -> bool:
+        with self.save_lock:
+            self.save_source_id = 0
+        self.save()
+        return False
+
+    def save(self) -> None:
+        """Store the pick history in the schema, must be called from the main loop"""
+        with self.save_lock:
+            if self.save_source_id:
+                GLib.source_remove(self.save_source_id)
+                self.save_source_id = 0
+        shared.state_schema.set_string(
+            "steam-limiter-tokens-history", self.pick_history.encode()
+        )
+
+
+class SteamAppCache:
+    """
+    Persistent cache of the Steam API results by appid.
+
+    Negative results (not found, not a game) are cached too,
+    each kind of result is kept for its own time to live.
+    """
+
+    schema_version = 1
+
+    # Seconds each kind of result is reused for
+    ttls = {
+        "game": 30 * 24 * 60 * 60,
+        "not_a_game": 30 * 24 * 60 * 60,
+        "not_found": 24 * 60 * 60,
+    }
+
+    path: Path
+    lock: Lock
+    connection: Optional[sqlite3.Connection] = None
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        self.lock = Lock()
+
+    def connect(self) -> Optional[sqlite3.Connection]:
+        """Open the cache on first use, the lock must be held"""
+        if self.connection:
+            return self.connection
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            # Used from the manager's worker threads, access is serialized by the lock
+            connection = sqlite3.connect(self.path, check_same_thread=False)
+            with connection:
+                connection.execute("PRAGMA journal_mode=WAL")
+                connection.execute(
+                    "CREATE TABLE IF NOT EXISTS apps ("
+                    "appid TEXT PRIMARY KEY, status TEXT NOT NULL, "
+                    "data TEXT, fetched REAL NOT NULL)"
+                )
+                connection.execute(f"PRAGMA user_version={self.schema_version}")
+        except (OSError, sqlite3.Error) as error:
+            logging.warning("Couldn't open the Steam app cache", exc_info=error)
+            return None
+        self.connection = connection
+        return connection
+
+    def get(self, appid: str) -> Optional[tuple[str, Optional[SteamAPIData]]]:
+        """Get the status and data of an appid if known and not expired"""
+        with self.lock:
+            if not (connection := self.connect()):
+                return None
+            try:
+                row = connection.execute(
+                    "SELECT status, data, fetched FROM apps WHERE appid = ?", (appid,)
+                ).fetchone()
+            except sqlite3.Error:
+                return None
+        if not row:
+            return None
+
+        status, data, fetched = row
+        if status not in self.ttls or time() > fetched + self.ttls[status]:
+            return None
+        return status, json.loads(data) if data else None
+
+    def set(self, appid: str, status: str, data: Optional[SteamAPIData] = None) -> None:
+        """Remember the result of the Steam API for an appid"""
+        with self.lock:
+            if not (connection := self.connect()):
+                return
+            try:
+                with connection:
+                    connection.execute(
+                        "INSERT OR REPLACE INTO apps (appid, status, data, fetched) "
+                        "VALUES (?, ?, ?, ?)",
+                        (appid, status, json.dumps(data) if data else None, time()),
+                    )
+            except sqlite3.Error as error:
+                logging.warning("Couldn't cache Steam app %s", appid, exc_info=error)
 
 
 class SteamFileHelper:
@@ -118,41 +237,68 @@ class SteamAPIHelper:
     """Helper around the Steam API"""
 
     base_url = "https://store.steampowered.com/api"
+
+    # Seconds API results are reused for before being revalidated
+    cache_max_age = 24 * 60 * 60
+
     rate_limiter: RateLimiter
+    app_cache: SteamAppCache
 
     def __init__(self, rate_limiter: RateLimiter) -> None:
         self.rate_limiter = rate_limiter
+        self.app_cache = SteamAppCache(shared.steam_app_cache_path)
 
     def get_api_data(self, appid: str) -> SteamAPIData:
         """
         Get online data for a game from its appid.
         May block to satisfy the Steam web API limitations.
+        Known appids and fresh HTTP cache entries are answered without taking
+        a token, only the requests that go to the network take one.
 
         See https://wiki.teamfortress.com/wiki/User:RJackson/StorefrontAPI#appdetails
         """
 
-        # Get data from the API (way block to satisfy its limits)
-        with self.rate_limiter:
-            try:
-                with requests.get(
-                    f"{self.base_url}/appdetails?appids={appid}", timeout=5
-                ) as response:
-                    response.raise_for_status()
-                    data = response.json()[appid]
-            except HTTPError as error:
-                logging.warning("Steam API HTTP error for %s", appid, exc_info=error)
-                raise error
+        if cached := self.app_cache.get(appid):
+            status, values = cached
+            logging.debug("Appid %s from cache (%s)", appid, status)
+            return self.get_cached_result(status, values)
+
+        # Get data from the API (may block to satisfy its limits)
+        try:
+            with http_client.get(
+                f"{self.base_url}/appdetails?appids={appid}",
+                max_age=self.cache_max_age,
+                rate_limiter=self.rate_limiter,
+            ) as response:
+                response.raise_for_status()
+                data = response.json()[appid]
+        except HTTPError as error:
+            logging.warning("Steam API HTTP error for %s", appid, exc_info=error)
+            raise error
 
         # Handle not found
         if not data["success"]:
             logging.debug("Appid %s not found", appid)
+            self.app_cache.set(appid, "not_found")
             raise SteamGameNotFoundError()
 
         # Handle appid is not a game
-        if data["data"]["type"] not in {"game", "demo", "mod"}:
+        if data["data"]["type"] not in STEAM_GAME_TYPES:
             logging.debug("Appid %s is not a game", appid)
+            self.app_cache.set(appid, "not_a_game")
             raise SteamNotAGameError()
 
         # Return API values we're interested in
         values = SteamAPIData(developer=", ".join(data["data"]["developers"]))
+        self.app_cache.set(appid, "game", values)
         return values
+
+    def get_cached_result(
+        self, status: str, values: Optional[SteamAPIData]
+    ) -> SteamAPIData:
+        """Return or raise a result from the app cache like the API would"""
+        if status == "not_found":
+            raise SteamGameNotFoundError()
+        if status == "not_a_game":
+            raise SteamNotAGameError()
+        return values  # type: ignore
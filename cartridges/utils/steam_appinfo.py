@@ -0,0 +1,197 @@
+# steam_appinfo.py
+#
+# Copyright 2024 kramo
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+import os
+import struct
+from pathlib import Path
+from typing import Any, BinaryIO, Iterable, Optional, TypedDict
+
+
+class SteamInvalidAppInfoError(Exception):
+    pass
+
+
+# App types that are games, others get blacklisted
+STEAM_GAME_TYPES = {"game", "demo", "mod"}
+
+
+class SteamAppInfoData(TypedDict):
+    """Dict returned by SteamAppInfoHelper.get_appinfo_data"""
+
+    type: str
+    developer: str
+
+
+class SteamAppInfoHelper:
+    """Helper for Steam's binary appinfo.vdf cache"""
+
+    # Versions of appinfo.vdf by magic number
+    appinfo_versions = {0x07564427: 27, 0x07564428: 28, 0x07564429: 29}
+
+    # Binary KeyValues types
+    kv_map = 0x00
+    kv_string = 0x01
+    kv_end = 0x08
+    kv_structs = {
+        0x02: struct.Struct("<i"),  # int32
+        0x03: struct.Struct("<f"),  # float32
+        0x04: struct.Struct("<i"),  # pointer
+        0x06: struct.Struct("<i"),  # color
+        0x07: struct.Struct("<Q"),  # uint64
+        0x0A: struct.Struct("<q"),  # int64
+    }
+    kv_wide_string = 0x05
+
+    def get_appinfo_data(
+        self, appinfo_path: Path, appids: Iterable[str]
+    ) -> dict[str, SteamAppInfoData]:
+        """
+        Get local data for apps from Steam's appinfo.vdf cache.
+
+        The file is streamed in one pass and only the entries
+        of the given appids are parsed.
+        Apps missing from the cache are missing from the result.
+        """
+        wanted = set(appids)
+        found = {}
+
+        with open(appinfo_path, "rb") as file:
+            magic, _universe = self.read_struct(file, "<II")
+            if (version := self.appinfo_versions.get(magic)) is None:
+                raise SteamInvalidAppInfoError(f"Unknown magic {magic:#x}")
+
+            # Since v29, keys are indexes in a string table at the end of the file
+            strings = None
+            if version >= 29:
+                (table_offset,) = self.read_struct(file, "<q")
+                entries_offset = file.tell()
+                file.seek(table_offset)
+                strings = self.parse_string_table(file.read())
+                file.seek(entries_offset)
+
+            # infoState, lastUpdated, picsToken, SHA-1, changeNumber
+            # then since v28, the SHA-1 of the binary data
+            fields_size = 60 if version >= 28 else 40
+
+            while wanted:
+                (appid,) = self.read_struct(file, "<I")
+                if not appid:
+                    break
+                (size,) = self.read_struct(file, "<I")
+                if (appid_str := str(appid)) not in wanted:
+                    file.seek(size, os.SEEK_CUR)
+                    continue
+
+                wanted.remove(appid_str)
+                if len(data := file.read(size)) < size:
+                    raise SteamInvalidAppInfoError("Truncated entry")
+                app_info = self.parse_binary_vdf(data, fields_size, strings)
+                if values := self.get_appinfo_values(app_info):
+                    found[appid_str] = values
+
+        return found
+
+    def read_struct(self, file: BinaryIO, struct_format: str) -> tuple:
+        data = file.read(struct.calcsize(struct_format))
+        try:
+            return struct.unpack(struct_format, data)
+        except struct.error as error:
+            raise SteamInvalidAppInfoError("Truncated file") from error
+
+    def parse_string_table(self, data: bytes) -> list[str]:
+        try:
+            (count,) = struct.unpack_from("<I", data)
+        except struct.error as error:
+            raise SteamInvalidAppInfoError("Truncated string table") from error
+        strings = data[4:].split(b"\0", count)[:count]
+        return [string.decode("utf-8", "replace") for string in strings]
+
+    def parse_binary_vdf(
+        self, data: bytes, offset: int, strings: Optional[list[str]]
+    ) -> dict[str, Any]:
+        """Parse binary KeyValues, keys are indexes in `strings` if given"""
+        root: dict[str, Any] = {}
+        stack = [root]
+        try:
+            while stack:
+                kv_type = data[offset]
+                offset += 1
+                if kv_type == self.kv_end:
+                    stack.pop()
+                    continue
+
+                if strings is None:
+                    end = data.index(b"\0", offset)
+                    key = data[offset:end].decode("utf-8", "replace")
+                    offset = end + 1
+                else:
+                    (index,) = struct.unpack_from("<i", data, offset)
+                    key = strings[index]
+                    offset += 4
+
+                if kv_type == self.kv_map:
+                    stack[-1][key] = value = {}
+                    stack.append(value)
+                elif kv_type == self.kv_string:
+                    end = data.index(b"\0", offset)
+                    stack[-1][key] = data[offset:end].decode("utf-8", "replace")
+                    offset = end + 1
+                elif kv_type == self.kv_wide_string:
+                    # Find the aligned UTF-16 terminator
+                    end = data.index(b"\0\0", offset)
+                    while (end - offset) % 2:
+                        end = data.index(b"\0\0", end + 1)
+                    stack[-1][key] = data[offset:end].decode("utf-16-le", "replace")
+                    offset = end + 2
+                elif kv_struct := self.kv_structs.get(kv_type):
+                    (stack[-1][key],) = kv_struct.unpack_from(data, offset)
+                    offset += kv_struct.size
+                else:
+                    raise SteamInvalidAppInfoError(f"Unknown KeyValues type {kv_type}")
+        except (IndexError, ValueError, struct.error) as error:
+            raise SteamInvalidAppInfoError("Malformed KeyValues") from error
+        return root
+
+    def get_appinfo_values(
+        self, app_info: dict[str, Any]
+    ) -> Optional[SteamAppInfoData]:
+        """Get the values we're interested in from a parsed appinfo entry"""
+        appinfo = app_info.get("appinfo", {})
+        common = appinfo.get("common", {})
+        if not isinstance(common, dict) or not (app_type := common.get("type")):
+            return None
+
+        associations = common.get("associations", {})
+        developers = [
+            association["name"]
+            for association in (
+                associations.values() if isinstance(associations, dict) else ()
+            )
+            if isinstance(association, dict)
+            and association.get("type") == "developer"
+            and association.get("name")
+        ]
+        extended = appinfo.get("extended", {})
+        if not developers and isinstance(extended, dict):
+            if developer := extended.get("developer"):
+                developers.append(str(developer))
+
+        return SteamAppInfoData(
+            type=str(app_type).lower(), developer=", ".join(developers)
+        )
@@ -22,12 +22,12 @@ import logging
 from pathlib import Path
 from typing import Any
 
-import requests
 from gi.repository import Gio
 from requests.exceptions import HTTPError
 
 from cartridges import shared
 from cartridges.game import Game
+from cartridges.utils.http_client import http_client
 from cartridges.utils.save_cover import convert_cover, save_cover
 
 
@@ -56,6 +56,9 @@ class SgdbHelper:
 
     base_url = "https://www.steamgriddb.com/api/v2/"
 
+    # Seconds API results are reused for before being revalidated
+    cache_max_age = 24 * 60 * 60
+
     @property
     def auth_headers(self) -> dict[str, str]:
         key = shared.schema.get_string("sgdb-key")
@@ -65,7 +68,9 @@ class SgdbHelper:
     def get_game_id(self, game: Game) -> Any:
         """Get grid results for a game. Can raise an exception."""
         uri = f"{self.base_url}search/autocomplete/{game.name}"
-        res = requests.get(uri, headers=self.auth_headers, timeout=5)
+        res = http_client.get(
+            uri, max_age=self.cache_max_age, headers=self.auth_headers
+        )
         match res.status_code:
             case 200:
                 return res.json()["data"][0]["id"]
@@ -81,7 +86,9 @@ class SgdbHelper:
         uri = f"{self.base_url}grids/game/{game_id}?dimensions=600x900"
         if animated:
             uri += "&types=animated"
-        res = requests.get(uri, headers=self.auth_headers, timeout=5)
+        res = http_client.get(
+            uri, max_age=self.cache_max_age, headers=self.auth_headers
+        )
         match res.status_code:
             case 200:
                 data = res.json()["data"]
@@ -130,7 +137,7 @@ class SgdbHelper:
         for uri_kwargs in image_uri_kwargs_sets:
             try:
                 uri = self.get_image_uri(sgdb_id, **uri_kwargs)
-                response = requests.get(uri, timeout=5)
+                response = http_client.get(uri)
                 tmp_file = Gio.File.new_tmp()[0]
                 tmp_file_path = tmp_file.get_path()
                 Path(tmp_file_path).write_bytes(response.content)
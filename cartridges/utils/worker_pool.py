@@ -0,0 +1,193 @@
+# worker_pool.py
+#
+# Copyright 2024 kramo
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+import logging
+from collections import deque
+from threading import Condition, Thread
+from time import monotonic
+from typing import Any, Callable, Optional
+
+# A queued job: queue time, job (None once taken), priority key
+Entry = list
+
+
+class WorkerPool:
+    """
+    Bounded set of worker threads running queued jobs.
+
+    Jobs are queued in groups (eg. by source) taken from in turn,
+    so one large group can't hold back the others. Within a group,
+    jobs run in submission order.
+
+    Jobs may be submitted with a key (eg. a game ID). Jobs whose key
+    has a priority set with `set_priorities` are taken before the others,
+    highest priority first.
+
+    Workers are started on demand, up to `max_workers`, and stay idle
+    waiting for new jobs afterwards. Jobs must not touch the GUI,
+    results are handed back to the main loop with `GLib.idle_add`.
+    """
+
+    name: str
+    max_workers: int
+
+    groups: dict[str, deque[Entry]]
+    group_turns: deque[str]
+    keyed_jobs: dict[str, deque[Entry]]
+    priority_keys: list[str]
+    condition: Condition
+    n_workers: int = 0
+    n_idle: int = 0
+
+    n_queued: int = 0
+    max_queued: int = 0
+    n_done: int = 0
+    total_wait: float = 0
+    max_wait: float = 0
+
+    def __init__(self, name: str, max_workers: int) -> None:
+        self.name = name
+        self.max_workers = max(1, max_workers)
+        self.groups = {}
+        self.group_turns = deque()
+        self.keyed_jobs = {}
+        self.priority_keys = []
+        self.condition = Condition()
+
+    @property
+    def stats(self) -> dict[str, Any]:
+        """Get the queue depth and the time jobs waited in the queue, in seconds"""
+        with self.condition:
+            return {
+                "n_queued": self.n_queued,
+                "max_queued": self.max_queued,
+                "n_done": self.n_done,
+                "total_wait": self.total_wait,
+                "max_wait": self.max_wait,
+            }
+
+    def reset_stats(self) -> None:
+        with self.condition:
+            self.max_queued = self.n_queued
+            self.n_done = 0
+            self.total_wait = 0
+            self.max_wait = 0
+
+    def set_priorities(self, priorities: dict[str, int]) -> None:
+        """Replace the priorities of the job keys, keys not given have none"""
+        with self.condition:
+            self.priority_keys = sorted(
+                (key for key, priority in priorities.items() if priority > 0),
+                key=priorities.__getitem__,
+                reverse=True,
+            )
+
+    def submit(
+        self, job: Callable[[], Any], group: str = "", key: Optional[str] = None
+    ) -> None:
+        """Queue a job to run on a worker thread"""
+        with self.condition:
+            entry = [monotonic(), job, key]
+            if not (jobs := self.groups.get(group)):
+                jobs = self.groups[group] = deque()
+                self.group_turns.append(group)
+            jobs.append(entry)
+            if key is not None:
+                self.keyed_jobs.setdefault(key, deque()).append(entry)
+            self.n_queued += 1
+            self.max_queued = max(self.max_queued, self.n_queued)
+
+            if self.n_queued > self.n_idle and self.n_workers < self.max_workers:
+                self.n_workers += 1
+                Thread(
+                    target=self.__work,
+                    name=f"{self.name}-{self.n_workers}",
+                    daemon=True,
+                ).start()
+            else:
+                self.condition.notify()
+
+    def __take_prioritized(self) -> Optional[Entry]:
+        """Take the queued entry with the highest priority key, if any"""
+        for key in self.priority_keys:
+            if not (entries := self.keyed_jobs.get(key)):
+                continue
+            entry = entries.popleft()
+            if not entries:
+                del self.keyed_jobs[key]
+            # The entry is left in its group, marked as taken
+            return entry
+        return None
+
+    @staticmethod
+    def __drop_taken(jobs: deque[Entry]) -> None:
+        """Drop the entries taken by priority from the front of a group"""
+        while jobs and jobs[0][1] is None:
+            jobs.popleft()
+
+    def __take_in_turn(self) -> Entry:
+        """Take the next entry of the group whose turn it is"""
+        while True:
+            group = self.group_turns.popleft()
+            jobs = self.groups[group]
+            self.__drop_taken(jobs)
+            if not jobs:
+                del self.groups[group]
+                continue
+
+            entry = jobs.popleft()
+            self.__drop_taken(jobs)
+            if jobs:
+                self.group_turns.append(group)
+            else:
+                del self.groups[group]
+
+            if (key := entry[2]) is not None:
+                entries = self.keyed_jobs[key]
+                entries.remove(entry)
+                if not entries:
+                    del self.keyed_jobs[key]
+            return entry
+
+    def __take(self) -> Callable[[], Any]:
+        """Take the next job, the lock must be held and a job be queued"""
+        entry = self.__take_prioritized() or self.__take_in_turn()
+        queued_time, job, _key = entry
+        entry[1] = None
+
+        wait = monotonic() - queued_time
+        self.n_queued -= 1
+        self.n_done += 1
+        self.total_wait += wait
+        self.max_wait = max(self.max_wait, wait)
+        return job
+
+    def __work(self) -> None:
+        while True:
+            with self.condition:
+                self.n_idle += 1
+                while not self.n_queued:
+                    self.condition.wait()
+                self.n_idle -= 1
+                job = self.__take()
+
+            try:
+                job()
+            except Exception as error:  # pylint: disable=broad-exception-caught
+                logging.error("Unhandled error in %s worker", self.name, exc_info=error)
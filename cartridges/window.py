@@ -19,12 +19,15 @@
 
 # pyright: reportAssignmentType=none
 
+from collections import OrderedDict
 from sys import platform
 from typing import Any, Optional
 
 from cartridges import shared
 from cartridges.game import Game
 from cartridges.game_cover import GameCover
+from cartridges.game_widget import GameItem, GameWidget
+from cartridges.store.search_index import normalize
 from cartridges.utils.relative_date import relative_date
 from gi.repository import Adw, Gio, GLib, Gtk, Pango
 
@@ -47,9 +50,10 @@ class CartridgesWindow(Adw.ApplicationWindow):
     details_view: Gtk.Overlay = Gtk.Template.Child()
     library_page: Adw.NavigationPage = Gtk.Template.Child()
     library_view: Adw.ToolbarView = Gtk.Template.Child()
-    library: Gtk.FlowBox = Gtk.Template.Child()
+    library: Gtk.GridView = Gtk.Template.Child()
     scrolledwindow: Gtk.ScrolledWindow = Gtk.Template.Child()
     library_overlay: Gtk.Overlay = Gtk.Template.Child()
+    enrichment_progress_bar: Gtk.ProgressBar = Gtk.Template.Child()
     notice_empty: Adw.StatusPage = Gtk.Template.Child()
     notice_no_results: Adw.StatusPage = Gtk.Template.Child()
     search_bar: Gtk.SearchBar = Gtk.Template.Child()
@@ -70,7 +74,7 @@ class CartridgesWindow(Adw.ApplicationWindow):
 
     hidden_library_page: Adw.NavigationPage = Gtk.Template.Child()
     hidden_primary_menu_button: Gtk.MenuButton = Gtk.Template.Child()
-    hidden_library: Gtk.FlowBox = Gtk.Template.Child()
+    hidden_library: Gtk.GridView = Gtk.Template.Child()
     hidden_library_view: Adw.ToolbarView = Gtk.Template.Child()
     hidden_scrolledwindow: Gtk.ScrolledWindow = Gtk.Template.Child()
     hidden_library_overlay: Gtk.Overlay = Gtk.Template.Child()
@@ -81,120 +85,141 @@ class CartridgesWindow(Adw.ApplicationWindow):
     hidden_search_button: Gtk.ToggleButton = Gtk.Template.Child()
 
     game_covers: dict = {}
+    # Covers no picture shows, kept for a while in case they are shown again
+    unused_game_covers: OrderedDict = OrderedDict()
+    max_unused_game_covers = 100
+    game_items: dict = {}
+    pending_game_items: dict = {False: {}, True: {}}
+    removed_game_items: set = set()
+    pending_game_items_source_id: int = 0
+    library_changes: set = set()
+    library_changes_tick_id: int = 0
     toasts: dict = {}
     active_game: Game
     details_view_game_cover: Optional[GameCover] = None
+    details_view_game_id: Optional[str] = None
     sort_state: str = "last_played"
+    search_queries: dict = {False: "", True: ""}
     filter_state: str = "all"
     source_rows: dict = {}
+    source_row_ids: dict = {}
+    source_rows_tick_id: int = 0
+    bound_game_ids: set = set()
+    priorities_source_id: int = 0
+
+    # Priorities of the games in the managers' queues, see `update_priorities`
+    search_priority = 1
+    visible_priority = 2
+    details_priority = 3
+
+    # Number of search results given a priority
+    max_prioritized_results = 100
+
+    def queue_source_rows_update(self) -> None:
+        """Update the sidebar on the next frame, merging the requests until then"""
+        if self.source_rows_tick_id:
+            return
 
-    def create_source_rows(self) -> None:
-        def get_removed(source_id: str) -> Any:
-            removed = tuple(
-                game.removed or game.hidden or game.blacklisted
-                for game in shared.store.source_games[source_id].values()
-            )
-            return (
-                (count,) if (count := sum(removed)) != len(removed) else False
-            )  # Return a tuple because 0 == False and 1 == True
-
-        total_games_no = 0
-        restored = False
+        def tick(*_args: Any) -> bool:
+            self.source_rows_tick_id = 0
+            self.update_source_rows()
+            return GLib.SOURCE_REMOVE
 
-        selected_id = (
-            self.source_rows[selected_row][0]
-            if (selected_row := self.sidebar.get_selected_row()) in self.source_rows
-            else None
-        )
+        self.source_rows_tick_id = self.add_tick_callback(tick)
 
-        if selected_row == self.added_row_box.get_parent():
-            self.sidebar.select_row(self.added_row_box.get_parent())
-            restored = True
+    def update_source_rows(self) -> None:
+        """Update the sidebar rows of the sources whose game counts changed"""
+        store = shared.store
+        selected_row = self.sidebar.get_selected_row()
 
-        if added_missing := (
-            not shared.store.source_games.get("imported")
-            or not (removed := get_removed("imported"))
-        ):
-            self.sidebar.select_row(self.all_games_row_box.get_parent())
-        else:
-            games_no = len(shared.store.source_games["imported"]) - removed[0]
-            self.added_games_no_label.set_label(str(games_no))
-            total_games_no += games_no
-        self.added_row_box.get_parent().set_visible(not added_missing)
+        for source_id in store.take_changed_sources():
+            games_no = store.get_source_count(source_id)
 
-        self.sidebar.get_row_at_index(2).set_visible(False)
+            if source_id == "imported":
+                added_row = self.added_row_box.get_parent()
+                added_row.set_visible(bool(games_no))
+                self.added_games_no_label.set_label(str(games_no))
+                if not games_no and selected_row == added_row:
+                    self.sidebar.select_row(self.all_games_row_box.get_parent())
+                continue
 
-        while row := self.sidebar.get_row_at_index(3):
-            self.sidebar.remove(row)
+            row = self.source_row_ids.get(source_id)
 
-        for source_id in shared.store.source_games:
-            if source_id == "imported":
+            if not games_no:
+                if row:
+                    self.source_row_ids.pop(source_id)
+                    self.source_rows.pop(row)
+                    if selected_row == row:
+                        self.sidebar.select_row(self.all_games_row_box.get_parent())
+                    self.sidebar.remove(row)
                 continue
-            if not (removed := get_removed(source_id)):
+
+            if not row:
+                self.create_source_row(source_id, games_no)
                 continue
 
-            row = Gtk.Box(
-                margin_top=12,
-                margin_bottom=12,
-                margin_start=6,
-                margin_end=6,
-                spacing=12,
-            )
-            games_no = len(shared.store.source_games[source_id]) - removed[0]
-            total_games_no += games_no
-
-            row.append(
-                Gtk.Image.new_from_icon_name(
-                    "user-desktop-symbolic"
-                    if (split_id := source_id.split("_")[0]) == "desktop"
-                    else f"{split_id}-source-symbolic"
-                )
-            )
+            self.source_rows[row] = (source_id, games_no)
+            row.get_child().get_last_child().set_label(str(games_no))
+            row.changed()  # Sort it again
+
+        self.sidebar.get_row_at_index(2).set_visible(bool(self.source_rows))
+        self.all_games_no_label.set_label(str(store.get_total_count()))
 
-            row.append(
-                Gtk.Label(
-                    label=self.get_application().get_source_name(source_id),
-                    halign=Gtk.Align.START,
-                    wrap=True,
-                    wrap_mode=Pango.WrapMode.CHAR,
-                )
+    def create_source_row(self, source_id: str, games_no: int) -> Gtk.ListBoxRow:
+        box = Gtk.Box(
+            margin_top=12,
+            margin_bottom=12,
+            margin_start=6,
+            margin_end=6,
+            spacing=12,
+        )
+
+        box.append(
+            Gtk.Image.new_from_icon_name(
+                "user-desktop-symbolic"
+                if (split_id := source_id.split("_")[0]) == "desktop"
+                else f"{split_id}-source-symbolic"
             )
+        )
 
-            row.append(
-                games_no_label := Gtk.Label(
-                    label=games_no,
-                    hexpand=True,
-                    halign=Gtk.Align.END,
-                )
+        box.append(
+            Gtk.Label(
+                label=self.get_application().get_source_name(source_id),
+                halign=Gtk.Align.START,
+                wrap=True,
+                wrap_mode=Pango.WrapMode.CHAR,
             )
+        )
 
-            games_no_label.add_css_class("dim-label")
-
-            # Order rows based on the number of games in them
-            index = 3
-            while source_row := self.sidebar.get_row_at_index(index):
-                if self.source_rows[source_row][1] < games_no:
-                    self.sidebar.insert(row, index)
-                    break
-                index += 1
-            if not row.get_parent():
-                self.sidebar.append(row)
-
-            self.source_rows[row.get_parent()] = (
-                source_id,
-                games_no,
+        box.append(
+            games_no_label := Gtk.Label(
+                label=str(games_no),
+                hexpand=True,
+                halign=Gtk.Align.END,
             )
+        )
 
-            if source_id == selected_id:
-                self.sidebar.select_row(row.get_parent())
-                restored = True
+        games_no_label.add_css_class("dim-label")
 
-            self.sidebar.get_row_at_index(2).set_visible(True)
+        # Register the row first, the sidebar sorts it while appending it
+        row = Gtk.ListBoxRow(child=box)
+        self.source_rows[row] = (source_id, games_no)
+        self.source_row_ids[source_id] = row
+        self.sidebar.append(row)
+        return row
 
-        self.all_games_no_label.set_label(str(total_games_no))
+    def sidebar_sort_func(self, row1: Gtk.ListBoxRow, row2: Gtk.ListBoxRow) -> int:
+        # The fixed rows come first, then sources with the most games
+        def get_key(row: Gtk.ListBoxRow) -> tuple[int, int]:
+            if row in self.sidebar_fixed_rows:
+                return (self.sidebar_fixed_rows.index(row), 0)
+            return (
+                len(self.sidebar_fixed_rows),
+                -self.source_rows.get(row, ("", 0))[1],
+            )
 
-        if not restored:
-            self.sidebar.select_row(self.all_games_row_box.get_parent())
+        key1, key2 = get_key(row1), get_key(row2)
+        return (key1 > key2) - (key1 < key2)
 
     def row_selected(self, _widget: Any, row: Gtk.ListBoxRow | None) -> None:
         if not row:
@@ -210,7 +235,7 @@ class CartridgesWindow(Adw.ApplicationWindow):
         self.library_page.set_title(self.get_application().get_source_name(value))
 
         self.filter_state = value
-        self.library.invalidate_filter()
+        self.library_filter.changed(Gtk.FilterChange.DIFFERENT)
 
         if self.overlay_split_view.get_collapsed():
             self.overlay_split_view.set_show_sidebar(False)
@@ -224,11 +249,38 @@ class CartridgesWindow(Adw.ApplicationWindow):
         self.details_view.set_measure_overlay(self.details_view_toolbar_view, True)
         self.details_view.set_clip_overlay(self.details_view_toolbar_view, False)
 
-        self.library.set_filter_func(self.filter_func)
-        self.hidden_library.set_filter_func(self.filter_func)
+        # Games are stored in list models, filtered then sorted.
+        # The grid views only create widgets for the visible games and recycle them.
+        self.library_items = Gio.ListStore.new(GameItem)
+        self.hidden_library_items = Gio.ListStore.new(GameItem)
 
-        self.library.set_sort_func(self.sort_func)
-        self.hidden_library.set_sort_func(self.sort_func)
+        self.library_filter = Gtk.CustomFilter.new(self.filter_func, False)
+        self.hidden_library_filter = Gtk.CustomFilter.new(self.filter_func, True)
+        self.library_sorter = Gtk.CustomSorter.new(self.sort_func, None)
+
+        self.library_model = Gtk.SortListModel.new(
+            Gtk.FilterListModel.new(self.library_items, self.library_filter),
+            self.library_sorter,
+        )
+        self.hidden_library_model = Gtk.SortListModel.new(
+            Gtk.FilterListModel.new(
+                self.hidden_library_items, self.hidden_library_filter
+            ),
+            self.library_sorter,
+        )
+
+        factory = Gtk.SignalListItemFactory()
+        factory.connect("setup", self.setup_game_widget)
+        factory.connect("bind", self.bind_game_widget)
+        factory.connect("unbind", self.unbind_game_widget)
+
+        for grid_view, model in (
+            (self.library, self.library_model),
+            (self.hidden_library, self.hidden_library_model),
+        ):
+            grid_view.set_model(Gtk.NoSelection.new(model))
+            grid_view.set_factory(factory)
+            model.connect("items-changed", self.set_library_child)
 
         self.set_library_child()
 
@@ -238,6 +290,12 @@ class CartridgesWindow(Adw.ApplicationWindow):
             shared.state_schema.get_boolean("show-sidebar")
         )
 
+        self.sidebar_fixed_rows = [
+            self.sidebar.get_row_at_index(index) for index in range(3)
+        ]
+        self.sidebar.set_sort_func(self.sidebar_sort_func)
+        self.added_row_box.get_parent().set_visible(False)
+        self.sidebar.get_row_at_index(2).set_visible(False)
         self.sidebar.select_row(self.all_games_row_box.get_parent())
 
         if shared.PROFILE == "development":
@@ -256,6 +314,8 @@ class CartridgesWindow(Adw.ApplicationWindow):
 
         self.navigation_view.connect("popped", self.set_show_hidden)
         self.navigation_view.connect("pushed", self.set_show_hidden)
+        self.navigation_view.connect("popped", self.queue_priorities_update)
+        self.navigation_view.connect("pushed", self.queue_priorities_update)
 
         self.sidebar.connect("row-selected", self.row_selected)
 
@@ -268,89 +328,295 @@ class CartridgesWindow(Adw.ApplicationWindow):
             shared.schema.bind(
                 "library-rows",
                 self.library,
-                "max-children-per-line",
+                "max-columns",
                 Gio.SettingsBindFlags.DEFAULT,
             )
             shared.schema.bind(
                 "library-rows",
                 self.hidden_library,
-                "max-children-per-line",
+                "max-columns",
                 Gio.SettingsBindFlags.DEFAULT,
             )
         else:
-            self.library.set_max_children_per_line(10)
-            self.hidden_library.set_max_children_per_line(10)
+            self.library.set_max_columns(10)
+            self.hidden_library.set_max_columns(10)
 
     def search_changed(self, _widget: Any, hidden: bool) -> None:
         # Refresh search filter on keystroke in search box
-        (self.hidden_library if hidden else self.library).invalidate_filter()
+        query = normalize(
+            (self.hidden_search_entry if hidden else self.search_entry).get_text()
+        )
+        previous_query = self.search_queries[hidden]
+        if query == previous_query:
+            return
+        self.search_queries[hidden] = query
+
+        # Only recheck the matching games when the query gets longer,
+        # or the games not matching when it gets shorter
+        if query.startswith(previous_query):
+            change = Gtk.FilterChange.MORE_STRICT
+        elif previous_query.startswith(query):
+            change = Gtk.FilterChange.LESS_STRICT
+        else:
+            change = Gtk.FilterChange.DIFFERENT
+
+        (self.hidden_library_filter if hidden else self.library_filter).changed(change)
+        self.queue_priorities_update()
+
+    def setup_game_widget(self, _factory: Any, list_item: Gtk.ListItem) -> None:
+        list_item.set_child(GameWidget())
+        list_item.set_activatable(False)
+        list_item.set_focusable(False)
+
+    def bind_game_widget(self, _factory: Any, list_item: Gtk.ListItem) -> None:
+        game = list_item.get_item().game
+        list_item.get_child().bind(game)
+        self.bound_game_ids.add(game.game_id)
+        self.queue_priorities_update()
+
+    def unbind_game_widget(self, _factory: Any, list_item: Gtk.ListItem) -> None:
+        widget = list_item.get_child()
+        if widget.game:
+            self.bound_game_ids.discard(widget.game.game_id)
+        widget.unbind()
+        self.queue_priorities_update()
+
+    def queue_priorities_update(self, *_args: Any) -> None:
+        """Update the priorities of games once scrolling or typing settles"""
+        if self.priorities_source_id:
+            return
 
-    def set_library_child(self) -> None:
-        child, hidden_child = self.notice_empty, self.hidden_notice_empty
+        def timeout() -> bool:
+            self.priorities_source_id = 0
+            self.update_priorities()
+            return GLib.SOURCE_REMOVE
 
-        for game in shared.store:
-            if game.removed or game.blacklisted:
+        self.priorities_source_id = GLib.timeout_add(100, timeout)
+
+    def update_priorities(self) -> None:
+        """
+        Let the managers process the games the user is looking at first.
+
+        That is the game on the details page, then the games in the
+        library viewport, then the first results of a search.
+        """
+        priorities = {}
+
+        for hidden, model in (
+            (False, self.library_model),
+            (True, self.hidden_library_model),
+        ):
+            if not self.search_queries[hidden]:
                 continue
-            if game.hidden:
-                if game.filtered and hidden_child:
-                    hidden_child = self.hidden_notice_no_results
-                    continue
-                hidden_child = None
-            else:
-                if game.filtered and child:
-                    child = self.notice_no_results
-                    continue
-                child = None
-
-        def remove_from_overlay(widget: Gtk.Widget) -> None:
-            if isinstance(widget.get_parent(), Gtk.Overlay):
-                widget.get_parent().remove_overlay(widget)
-
-        if child:
-            self.library_overlay.add_overlay(child)
-        else:
-            remove_from_overlay(self.notice_empty)
-            remove_from_overlay(self.notice_no_results)
+            for index in range(min(model.get_n_items(), self.max_prioritized_results)):
+                priorities[model.get_item(index).game.game_id] = self.search_priority
+
+        # Grid views only bind the items in and around the viewport
+        for game_id in self.bound_game_ids:
+            priorities[game_id] = self.visible_priority
+
+        if self.navigation_view.get_visible_page() == self.details_page:
+            priorities[self.active_game.game_id] = self.details_priority
+
+        shared.store.set_game_priorities(priorities)
+
+    def add_game_item(self, game: Game) -> None:
+        """
+        Add a game to the library it belongs in.
+
+        Games are inserted in batches, so the models filter and sort
+        a whole import at once instead of once per game.
+        """
+        self.game_items[game.game_id] = item = GameItem(game)
+        self.pending_game_items[game.hidden][game.game_id] = item
+        if not self.pending_game_items_source_id:
+            self.pending_game_items_source_id = GLib.idle_add(self.flush_game_items)
+
+    def flush_game_items(self) -> bool:
+        """Remove and insert the pending games in the libraries"""
+        self.pending_game_items_source_id = 0
+        removed, self.removed_game_items = self.removed_game_items, set()
+        for hidden, items in (
+            (False, self.library_items),
+            (True, self.hidden_library_items),
+        ):
+            if removed:
+                # Find all the removed games in one pass, then remove each run of them
+                positions = [
+                    position
+                    for position in range(items.get_n_items())
+                    if items.get_item(position) in removed
+                ]
+                while positions:
+                    end = positions.pop() + 1
+                    start = end - 1
+                    while positions and positions[-1] == start - 1:
+                        start = positions.pop()
+                    items.splice(start, end - start, ())
+
+            if pending := self.pending_game_items[hidden]:
+                items.splice(items.get_n_items(), 0, tuple(pending.values()))
+                pending.clear()
+        return False
+
+    def remove_game_item(self, game: Game) -> None:
+        """Remove a game from the library it is in"""
+        if not (item := self.game_items.pop(game.game_id, None)):
+            return
+
+        for pending in self.pending_game_items.values():
+            if pending.pop(game.game_id, None):
+                return
+
+        # Removed in batches too, finding a game in a library means going through it
+        self.removed_game_items.add(item)
+        if not self.pending_game_items_source_id:
+            self.pending_game_items_source_id = GLib.idle_add(self.flush_game_items)
+
+    def update_game_item(self, game: Game, dirty: set[str]) -> None:
+        """Show the changes of a game, filter and sort the libraries again if needed"""
+        if game.game_id not in self.game_items:
+            return
+
+        if game.widget:
+            game.widget.refresh()
+
+        if dirty & {"name", "developer"}:
+            self.library_changes.add("filter")
+        if dirty & {"name", "added", "last_played"}:
+            self.library_changes.add("sort")
+        if self.library_changes and not self.library_changes_tick_id:
+            self.library_changes_tick_id = self.add_tick_callback(
+                self.apply_library_changes
+            )
+
+    def apply_library_changes(self, *_args: Any) -> bool:
+        """Filter and sort the libraries again, once per frame for all the changes"""
+        self.library_changes_tick_id = 0
+        changes, self.library_changes = self.library_changes, set()
+
+        if "filter" in changes:
+            # Without a search, games are only filtered by their source
+            for hidden, library_filter in (
+                (False, self.library_filter),
+                (True, self.hidden_library_filter),
+            ):
+                if self.search_queries[hidden]:
+                    library_filter.changed(Gtk.FilterChange.DIFFERENT)
+        if "sort" in changes:
+            self.library_sorter.changed(Gtk.SorterChange.DIFFERENT)
+
+        return GLib.SOURCE_REMOVE
+
+    def set_enrichment_progress(self, n_done: int, n_total: int) -> None:
+        """Show the progress of fetching online game data in the background"""
+        self.enrichment_progress_bar.set_visible(n_done < n_total)
+        if n_total:
+            self.enrichment_progress_bar.set_fraction(n_done / n_total)
+
+    def add_game_cover(self, game: Game, picture: Gtk.Picture) -> None:
+        """Show the cover of a game in a picture, loading it on first use"""
+        if game.game_cover and picture in game.game_cover.pictures:
+            if game.game_cover is self.game_covers.get(game.game_id):
+                return
+            # The cover was replaced
+            game.game_cover.pictures.discard(picture)
 
-        if hidden_child:
-            self.hidden_library_overlay.add_overlay(hidden_child)
+        self.unused_game_covers.pop(game.game_id, None)
+        if game_cover := self.game_covers.get(game.game_id):
+            game_cover.add_picture(picture)
         else:
-            remove_from_overlay(self.hidden_notice_empty)
-            remove_from_overlay(self.hidden_notice_no_results)
+            game_cover = GameCover({picture}, game.get_cover_path())
+            self.game_covers[game.game_id] = game_cover
+        game.game_cover = game_cover
 
-    def filter_func(self, child: Gtk.Widget) -> bool:
-        game = child.get_child()
-        text = (
+    def release_game_cover(
+        self, game_id: str, game_cover: GameCover, picture: Gtk.Picture
+    ) -> None:
+        """
+        Stop showing a game's cover in a picture.
+
+        Covers no picture shows are unloaded,
+        except for the most recently shown ones.
+        """
+        game_cover.pictures.discard(picture)
+        if game_cover.pictures or self.game_covers.get(game_id) is not game_cover:
+            return
+
+        # Stop animating it
+        game_cover.animation = None
+        self.unused_game_covers[game_id] = game_cover
+        self.unused_game_covers.move_to_end(game_id)
+
+        while len(self.unused_game_covers) > self.max_unused_game_covers:
+            game_id, game_cover = self.unused_game_covers.popitem(last=False)
+            if self.game_covers.get(game_id) is game_cover:
+                del self.game_covers[game_id]
+            if (game := shared.store.get(game_id)) and game.game_cover is game_cover:
+                game.game_cover = None
+
+    def set_library_child(self, *_args: Any) -> None:
+        for overlay, items, model, notice_empty, notice_no_results in (
             (
-                self.hidden_search_entry
-                if self.navigation_view.get_visible_page() == self.hidden_library_page
-                else self.search_entry
-            )
-            .get_text()
-            .lower()
+                self.library_overlay,
+                self.library_items,
+                self.library_model,
+                self.notice_empty,
+                self.notice_no_results,
+            ),
+            (
+                self.hidden_library_overlay,
+                self.hidden_library_items,
+                self.hidden_library_model,
+                self.hidden_notice_empty,
+                self.hidden_notice_no_results,
+            ),
+        ):
+            child = None
+            if not items.get_n_items():
+                child = notice_empty
+            elif not model.get_n_items():
+                child = notice_no_results
+
+            for notice in (notice_empty, notice_no_results):
+                if notice == child:
+                    if not notice.get_parent():
+                        overlay.add_overlay(notice)
+                elif notice.get_parent():
+                    overlay.remove_overlay(notice)
+
+    def filter_func(self, item: GameItem, hidden: bool) -> bool:
+        return shared.store.search_index.matches(
+            item.game.game_id,
+            self.search_queries[hidden],
+            None if self.filter_state == "all" else self.filter_state,
         )
 
-        filtered = text != "" and not (
-            text in game.name.lower()
-            or (text in game.developer.lower() if game.developer else False)
-        )
+    def create_game_toast(
+        self, game: Game, title: str, action: Optional[str] = None
+    ) -> None:
+        toast = Adw.Toast.new(title.format(game.name))
+        toast.set_priority(Adw.ToastPriority.HIGH)
+        toast.set_use_markup(False)
 
-        if not filtered:
-            if self.filter_state == "all":
-                pass
-            elif game.base_source != self.filter_state:
-                filtered = True
+        if action:
+            toast.set_button_label(_("Undo"))
+            toast.connect("button-clicked", self.on_undo_action, game, action)
 
-        game.filtered = filtered
-        self.set_library_child()
+            if (game, action) in self.toasts.keys():
+                # Dismiss the toast if there already is one
+                self.toasts[(game, action)].dismiss()
+
+            self.toasts[(game, action)] = toast
 
-        return not filtered
+        self.toast_overlay.add_toast(toast)
 
     def set_active_game(self, _widget: Any, _pspec: Any, game: Game) -> None:
         self.active_game = game
 
     def show_details_page(self, game: Game) -> None:
         self.active_game = game
+        self.queue_priorities_update()
 
         self.details_view_cover.set_opacity(int(not game.loading))
         self.details_view_spinner.set_visible(game.loading)
@@ -365,11 +631,16 @@ class CartridgesWindow(Adw.ApplicationWindow):
         self.details_view_hide_button.set_icon_name(icon)
         self.details_view_hide_button.set_tooltip_text(text)
 
-        if self.details_view_game_cover:
-            self.details_view_game_cover.pictures.remove(self.details_view_cover)
+        if self.details_view_game_cover and self.details_view_game_id != game.game_id:
+            self.release_game_cover(
+                self.details_view_game_id,  # type: ignore
+                self.details_view_game_cover,
+                self.details_view_cover,
+            )
 
+        self.add_game_cover(game, self.details_view_cover)
         self.details_view_game_cover = game.game_cover
-        self.details_view_game_cover.add_picture(self.details_view_cover)
+        self.details_view_game_id = game.game_id
 
         self.details_view_blurred_cover.set_paintable(
             self.details_view_game_cover.get_blurred()
@@ -413,8 +684,8 @@ class CartridgesWindow(Adw.ApplicationWindow):
             else self.details_view_game_cover.luminance[1]  # type: ignore
         )
 
-    def sort_func(self, child1: Gtk.Widget, child2: Gtk.Widget) -> int:
-        var, order = "name", True
+    def sort_func(self, item1: GameItem, item2: GameItem, _data: Any) -> int:
+        var, order = "sort_name", True
 
         if self.sort_state in ("newest", "oldest"):
             var, order = "added", self.sort_state == "newest"
@@ -423,17 +694,16 @@ class CartridgesWindow(Adw.ApplicationWindow):
         elif self.sort_state == "a-z":
             order = False
 
-        def get_value(index: int) -> str:
-            return (
-                str(getattr((child1.get_child(), child2.get_child())[index], var))
-                .lower()
-                .removeprefix("the ")
-            )
+        # Keys are typed and cached on the games, see `Game.sort_name`
+        key1, key2 = getattr(item1.game, var), getattr(item2.game, var)
 
-        if var != "name" and get_value(0) == get_value(1):
-            var, order = "name", False
+        if var != "sort_name" and key1 == key2:
+            order = False
+            key1, key2 = item1.game.sort_name, item2.game.sort_name
 
-        return ((get_value(0) > get_value(1)) ^ order) * 2 - 1
+        if key1 == key2:
+            return 0
+        return ((key1 > key2) ^ order) * 2 - 1
 
     def set_show_hidden(self, navigation_view: Adw.NavigationView, *_args: Any) -> None:
         self.lookup_action("show_hidden").set_enabled(
@@ -462,7 +732,7 @@ class CartridgesWindow(Adw.ApplicationWindow):
     def on_sort_action(self, action: Gio.SimpleAction, state: GLib.Variant) -> None:
         action.set_state(state)
         self.sort_state = str(state).strip("'")
-        self.library.invalidate_sort()
+        self.library_sorter.changed(Gtk.SorterChange.DIFFERENT)
 
         shared.state_schema.set_string("sort-mode", self.sort_state)
 
@@ -484,20 +754,14 @@ class CartridgesWindow(Adw.ApplicationWindow):
         search_entry.set_text("")
 
     def show_details_page_search(self, widget: Gtk.Widget) -> None:
-        library = (
-            self.hidden_library if widget == self.hidden_search_entry else self.library
+        model = (
+            self.hidden_library_model
+            if widget == self.hidden_search_entry
+            else self.library_model
         )
-        index = 0
-
-        while True:
-            if not (child := library.get_child_at_index(index)):
-                break
-
-            if self.filter_func(child):
-                self.show_details_page(child.get_child())
-                break
 
-            index += 1
+        if item := model.get_item(0):
+            self.show_details_page(item.game)
 
     def on_undo_action(
         self, _widget: Any, game: Optional[Game] = None, undo: Optional[str] = None
@@ -534,4 +798,4 @@ class CartridgesWindow(Adw.ApplicationWindow):
             self.hidden_primary_menu_button.popup()
 
     def on_close_action(self, *_args: Any) -> None:
-        self.close()
\ No newline at end of file
+        self.close()
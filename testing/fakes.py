@@ -0,0 +1,37 @@
+# fakes.py
+#
+# Copyright 2024 kramo
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+"""Stand-ins for the app's objects, for the tests and benchmarks"""
+
+from typing import Any
+
+
+class FakeGame:
+    """The attributes of a game that the library indexes use"""
+
+    def __init__(self, game_id: str, **kwargs: Any) -> None:
+        self.game_id = game_id
+        self.base_source = kwargs.pop("base_source", game_id.split("_")[0])
+        self.name = kwargs.pop("name", game_id)
+        self.developer = kwargs.pop("developer", None)
+        self.hidden = kwargs.pop("hidden", False)
+        self.removed = kwargs.pop("removed", False)
+        self.blacklisted = kwargs.pop("blacklisted", False)
+        for key, value in kwargs.items():
+            setattr(self, key, value)
@@ -0,0 +1,112 @@
+# steam_appinfo.py
+#
+# Copyright 2024 kramo
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+"""Write Steam's binary appinfo.vdf, for the tests and benchmarks"""
+
+import struct
+from pathlib import Path
+from typing import Any, Optional
+
+MAGICS = {27: 0x07564427, 28: 0x07564428, 29: 0x07564429}
+
+
+class Int64(int):
+    """An int written as a KeyValues int64"""
+
+
+class KeyValuesWriter:
+    """Write binary KeyValues, keys go in a string table if one is given"""
+
+    def __init__(self, strings: Optional[list[str]] = None) -> None:
+        self.strings = strings
+
+    def key(self, key: str) -> bytes:
+        if self.strings is None:
+            return key.encode() + b"\0"
+        if key not in self.strings:
+            self.strings.append(key)
+        return struct.pack("<i", self.strings.index(key))
+
+    def write(self, values: dict[str, Any]) -> bytes:
+        data = []
+        for key, value in values.items():
+            if isinstance(value, dict):
+                data.append(b"\x00" + self.key(key) + self.write(value))
+            elif isinstance(value, str):
+                data.append(b"\x01" + self.key(key) + value.encode() + b"\0")
+            elif isinstance(value, Int64):
+                data.append(b"\x0a" + self.key(key) + struct.pack("<q", value))
+            elif isinstance(value, int):
+                data.append(b"\x02" + self.key(key) + struct.pack("<i", value))
+            elif isinstance(value, float):
+                data.append(b"\x03" + self.key(key) + struct.pack("<f", value))
+            else:
+                # Wide strings are given as bytes
+                data.append(b"\x05" + self.key(key) + value + b"\0\0")
+        return b"".join(data) + b"\x08"
+
+
+def write_appinfo(path: Path, version: int, apps: dict[int, dict[str, Any]]) -> Path:
+    """Write an appinfo.vdf file of a version with the given apps"""
+    strings: Optional[list[str]] = [] if version >= 29 else None
+    writer = KeyValuesWriter(strings)
+
+    chunks = []
+    for appid, values in apps.items():
+        # infoState, lastUpdated, picsToken, SHA-1, changeNumber
+        fields = struct.pack("<IIQ20sI", 2, 1700000000, 0, b"\1" * 20, 1234)
+        if version >= 28:
+            fields += b"\2" * 20
+        entry = fields + writer.write(values)
+        chunks.append(struct.pack("<II", appid, len(entry)) + entry)
+    chunks.append(struct.pack("<I", 0))
+    entries = b"".join(chunks)
+
+    data = struct.pack("<II", MAGICS[version], 1)
+    if strings is not None:
+        table_offset = len(data) + 8 + len(entries)
+        data += struct.pack("<q", table_offset) + entries
+        data += struct.pack("<I", len(strings))
+        data += b"".join(string.encode() + b"\0" for string in strings)
+    else:
+        data += entries
+
+    path.write_bytes(data)
+    return path
+
+
+def app(
+    app_type: str, name: str, developers: tuple[str, ...] = (), **common: Any
+) -> dict[str, Any]:
+    associations = {
+        str(index): {"type": "developer", "name": developer}
+        for index, developer in enumerate(developers)
+    }
+    associations[str(len(associations))] = {"type": "publisher", "name": "Publisher"}
+    return {
+        "appinfo": {
+            "appid": 0,
+            "common": {
+                "name": name,
+                "type": app_type,
+                "associations": associations,
+                **common,
+            },
+        }
+    }
@@ -0,0 +1,146 @@
+# test_library_index.py
+#
+# Copyright 2024 kramo
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+from threading import Thread
+
+from cartridges.store.library_index import LibraryIndex
+
+FLAGS = ("hidden", "removed", "blacklisted")
+
+
+def test_add_indexes_by_id_source_and_flag(fake_game):
+    index = LibraryIndex(FLAGS)
+    steam = fake_game("steam_1")
+    hidden = fake_game("steam_2", hidden=True)
+    lutris = fake_game("lutris_1", removed=True)
+    for game in (steam, hidden, lutris):
+        index.add(game)
+
+    assert index.games == {"steam_1": steam, "steam_2": hidden, "lutris_1": lutris}
+    assert set(index.source_games["steam"]) == {"steam_1", "steam_2"}
+    assert index.flag_games["hidden"] == {"steam_2"}
+    assert index.flag_games["removed"] == {"lutris_1"}
+    assert set(index.games_without_flag("removed")) == {steam, hidden}
+    assert set(index.games_without_flag("removed", "steam")) == {steam, hidden}
+    assert not index.games_without_flag("removed", "lutris")
+    assert not index.games_without_flag("removed", "heroic")
+
+
+def test_update_flags_follows_the_game(fake_game):
+    index = LibraryIndex(FLAGS)
+    game = fake_game("steam_1")
+    index.add(game)
+
+    game.removed = True
+    index.update_flags(game)
+    assert index.flag_games["removed"] == {"steam_1"}
+    assert not index.games_without_flag("removed")
+
+    game.removed = False
+    index.update_flags(game)
+    assert not index.flag_games["removed"]
+
+
+def test_update_flags_ignores_other_instances(fake_game):
+    index = LibraryIndex(FLAGS)
+    index.add(fake_game("steam_1"))
+
+    index.update_flags(fake_game("steam_1", hidden=True))
+    assert not index.flag_games["hidden"]
+
+
+def test_replacing_a_game_updates_its_flags(fake_game):
+    index = LibraryIndex(FLAGS)
+    index.add(fake_game("steam_1", removed=True))
+
+    replacement = fake_game("steam_1")
+    index.add(replacement)
+    assert index.games["steam_1"] is replacement
+    assert index.games_without_flag("removed") == [replacement]
+
+
+def test_concurrent_updates_keep_the_counts(fake_game):
+    index = LibraryIndex(FLAGS)
+    games = [fake_game(f"steam_{number}") for number in range(400)]
+
+    def toggle(games):
+        for game in games:
+            index.add(game)
+        for _round in range(50):
+            for game in games:
+                game.hidden = not game.hidden
+                index.update_flags(game)
+            index.take_changed_sources()
+
+    threads = [Thread(target=toggle, args=(games[start::4],)) for start in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert index.source_counts["steam"] == {"visible": 400, "hidden": 0, "removed": 0}
+    assert index.get_total_count() == 400
+    assert not index.flag_games["hidden"]
+
+
+def test_source_counts_follow_the_flags(fake_game):
+    index = LibraryIndex(FLAGS)
+
+    def counts(source_id="steam"):
+        return tuple(
+            index.get_source_count(source_id, state)
+            for state in ("visible", "hidden", "removed")
+        )
+
+    def change(game, **flags):
+        for flag, value in flags.items():
+            setattr(game, flag, value)
+        index.update_flags(game)
+
+    game = fake_game("steam_1")
+    index.add(game)
+    index.add(fake_game("steam_2"))
+    index.add(fake_game("lutris_1", hidden=True))
+    assert counts() == (2, 0, 0)
+    assert counts("lutris") == (0, 1, 0)
+    assert index.take_changed_sources() == {"steam", "lutris"}
+
+    change(game, hidden=True)
+    assert counts() == (1, 1, 0)
+    change(game, removed=True)
+    assert counts() == (1, 0, 1)
+    assert index.take_changed_sources() == {"steam"}
+
+    # Blacklisted and removed games are counted once
+    change(game, blacklisted=True)
+    change(game, removed=False)
+    assert counts() == (1, 0, 1)
+    assert not index.take_changed_sources()
+
+    change(game, hidden=False, blacklisted=False)
+    assert counts() == (2, 0, 0)
+    assert index.take_changed_sources() == {"steam"}
+
+    # A removed game replaced by a new one is counted once
+    change(game, removed=True)
+    index.add(fake_game("steam_1"))
+    assert counts() == (2, 0, 0)
+    assert index.get_total_count() == 2
+    assert index.get_total_count("hidden") == 1
+    assert counts("heroic") == (0, 0, 0)
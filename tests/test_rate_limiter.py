@@ -0,0 +1,276 @@
+# test_rate_limiter.py
+#
+# Copyright 2024 kramo
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+from threading import Condition, Thread
+from time import sleep
+from typing import Callable, Optional
+
+import pytest
+
+from cartridges.utils.rate_limiter import PickHistory, RateLimiter
+
+
+class FakeClock:
+    """A clock that only moves when told to"""
+
+    def __init__(self, now: float = 1000) -> None:
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class FakeRateLimiter(RateLimiter):
+    """
+    A rate limiter on a fake clock.
+
+    Waits only end when notified, the timeouts asked for are recorded.
+    """
+
+    refill_period_seconds = 10
+    refill_period_tokens = 5
+    burst_tokens = 2
+
+    waits: list[Optional[float]]
+
+    def __init__(self, clock: FakeClock) -> None:
+        self.waits = []
+        super().__init__(clock, clock)
+
+    def wait(self, turn: Condition, timeout: Optional[float] = None) -> None:
+        self.waits.append(timeout)
+        turn.wait()
+
+    def advance(self, seconds: float) -> None:
+        """Move the clock, waking the waiter whose timeout would have ended"""
+        with self.lock:
+            self.clock.now += seconds
+            if self.queue:
+                self.queue[0].notify()
+
+
+def wait_until(predicate: Callable[[], bool]) -> None:
+    for _try in range(1000):
+        if predicate():
+            return
+        sleep(0.001)
+    raise AssertionError("Timed out")
+
+
+def start_acquiring(limiter: FakeRateLimiter, name: str, acquired: list) -> Thread:
+    """Acquire a token in a thread, once it is queued"""
+    n_queued = len(limiter.queue)
+
+    def acquire() -> None:
+        limiter.acquire()
+        acquired.append(name)
+
+    thread = Thread(target=acquire, daemon=True)
+    thread.start()
+    wait_until(lambda: len(limiter.queue) > n_queued or name in acquired)
+    return thread
+
+
+@pytest.fixture
+def limiter() -> FakeRateLimiter:
+    return FakeRateLimiter(FakeClock())
+
+
+def test_burst_is_immediate(limiter):
+    limiter.acquire()
+    limiter.acquire()
+
+    assert not limiter.waits
+    assert limiter.n_tokens == 0
+    assert len(limiter.pick_history) == 2
+
+
+def test_waits_exactly_until_the_refill(limiter):
+    acquired = []
+    limiter.acquire()
+    limiter.acquire()
+
+    thread = start_acquiring(limiter, "first", acquired)
+    # One token every 2 seconds, the waiter sleeps once without polling
+    wait_until(lambda: len(limiter.waits) == 1)
+    assert limiter.waits == [pytest.approx(2)]
+    assert not acquired
+
+    # Woken early, it goes back to sleep for the rest
+    limiter.advance(0.5)
+    wait_until(lambda: len(limiter.waits) == 2)
+    assert limiter.waits[1] == pytest.approx(1.5)
+    assert not acquired
+
+    limiter.advance(1.5)
+    thread.join(1)
+    assert acquired == ["first"]
+    assert len(limiter.waits) == 2
+    assert limiter.n_tokens == 0
+
+
+def test_refills_continuously_up_to_the_burst(limiter):
+    limiter.acquire()
+    limiter.acquire()
+
+    limiter.clock.now += 3
+    assert limiter.n_tokens == 1
+    limiter.clock.now += 100
+    assert limiter.n_tokens == 2
+
+
+def test_the_period_limit_holds_after_bursts(limiter):
+    # 5 tokens per 10 seconds, picks spaced by the refill still hit the window
+    for _pick in range(5):
+        limiter.clock.now += 2
+        limiter.acquire()
+    limiter.clock.now += 2
+    first_pick = limiter.pick_history.timestamps[0]
+
+    assert limiter.n_tokens == 2
+    with limiter.lock:
+        delay = limiter.get_delay(limiter.clock.now)
+    assert delay == pytest.approx(first_pick + 10 - limiter.clock.now)
+
+
+def test_waiters_are_released_in_order(limiter):
+    acquired = []
+    limiter.acquire()
+    limiter.acquire()
+
+    names = [f"waiter {number}" for number in range(5)]
+    threads = [start_acquiring(limiter, name, acquired) for name in names]
+    # Only the first in queue waits for a token, the others for their turn
+    wait_until(lambda: len(limiter.waits) == 5)
+    assert sorted(limiter.waits, key=lambda timeout: timeout or 0) == [
+        None,
+        None,
+        None,
+        None,
+        pytest.approx(2),
+    ]
+
+    # Move the clock to each timeout, the next waiter then waits for its token
+    while len(acquired) < len(names):
+        n_waits, n_acquired = len(limiter.waits), len(acquired)
+        limiter.advance(next(filter(None, reversed(limiter.waits))))
+        wait_until(lambda: len(acquired) > n_acquired)
+        wait_until(lambda: len(limiter.waits) > n_waits or len(acquired) == len(names))
+    for thread in threads:
+        thread.join(1)
+
+    assert acquired == names
+    # The fourth waiter hits the limit of 5 picks in 10 seconds,
+    # the last one then has a token left
+    assert limiter.waits[5:] == [pytest.approx(2), pytest.approx(2), pytest.approx(4)]
+    assert limiter.clock.now == pytest.approx(1010)
+
+
+def test_history_converts_from_the_wall_clock():
+    clock = FakeClock(50)
+    wall_clock = FakeClock(1_700_000_000)
+    history = PickHistory(10, clock, wall_clock)
+
+    history.add(wall_clock.now - 12, wall_clock.now - 4)
+    history.add()
+    assert list(history.timestamps) == [38, 46, 50]
+    assert len(history) == 2
+    assert history.copy_timestamps() == [wall_clock.now - 4, wall_clock.now]
+
+
+class RestartedRateLimiter(FakeRateLimiter):
+    """A fake rate limiter loading a saved history, like the Steam one"""
+
+    def __init__(self, clock: FakeClock, wall_clock: FakeClock, history: str) -> None:
+        self.history = history
+        self.waits = []
+        RateLimiter.__init__(self, clock, wall_clock)
+
+    def _init_pick_history(self) -> None:
+        super()._init_pick_history()
+        self.pick_history.load(self.history)
+
+
+def test_history_survives_a_restart(limiter):
+    limiter.clock.now = 1_700_000_000
+    limiter.acquire()
+    limiter.acquire()
+    limiter.advance(1)
+    saved = limiter.pick_history.encode()
+
+    # 3 seconds later, the new process' monotonic clock started from 0
+    restarted = RestartedRateLimiter(
+        FakeClock(2), FakeClock(limiter.clock.now + 3), saved
+    )
+
+    assert len(restarted.pick_history) == 2
+    # Both burst tokens were spent 4 seconds ago, 2 were refilled since
+    assert restarted.n_tokens == 2
+    restarted.acquire()
+    restarted.acquire()
+    assert not restarted.waits
+    assert restarted.n_tokens == 0
+
+
+def test_history_restart_keeps_the_period_limit(limiter):
+    for _pick in range(5):
+        limiter.clock.now += 2
+        limiter.acquire()
+    saved = limiter.pick_history.encode()
+    wall_now = limiter.clock.now
+
+    restarted = RestartedRateLimiter(FakeClock(0), FakeClock(wall_now + 1), saved)
+
+    assert len(restarted.pick_history) == 5
+    with restarted.lock:
+        # The first pick leaves the window 10 seconds after it was made
+        assert restarted.get_delay(0) == pytest.approx(1)
+
+
+def test_history_encoding():
+    wall_clock = FakeClock(1_700_000_000.01)
+    history = PickHistory(300, FakeClock(0), wall_clock)
+    history.add(wall_clock.now - 10.5, wall_clock.now)
+
+    encoded = history.encode()
+    assert encoded == "16999999896,105"
+
+    loaded = PickHistory(300, FakeClock(0), wall_clock)
+    loaded.load(encoded)
+    # Rounded up, never earlier than the picks
+    assert loaded.copy_timestamps() == [
+        pytest.approx(1_699_999_989.6),
+        pytest.approx(1_700_000_000.1),
+    ]
+
+
+def test_history_loads_the_legacy_format():
+    history = PickHistory(300, FakeClock(0), FakeClock(1_700_000_000))
+    history.load("[1699999990.5, 1700000000]")
+
+    assert history.copy_timestamps() == [1699999990.5, 1700000000]
+
+
+@pytest.mark.parametrize("history_str", ("1,a", "[null]", "[1"))
+def test_invalid_histories_are_rejected(history_str):
+    history = PickHistory(300, FakeClock(0), FakeClock(1_700_000_000))
+
+    with pytest.raises((TypeError, ValueError)):
+        history.load(history_str)
+    assert not history.timestamps
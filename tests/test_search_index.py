@@ -0,0 +1,59 @@
+# test_search_index.py
+#
+# Copyright 2024 kramo
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+from cartridges.store.search_index import SearchIndex, normalize
+
+
+def test_matches_name_developer_and_source(fake_game):
+    index = SearchIndex()
+    index.update(fake_game("steam_1", name="The Witcher 3", developer="CD PROJEKT"))
+    index.update(fake_game("lutris_1", name="Straße"))
+
+    assert index.matches("steam_1", normalize("witcher"))
+    assert index.matches("steam_1", normalize("projekt"))
+    assert index.matches("steam_1", normalize("Witcher"), "steam")
+    assert not index.matches("steam_1", normalize("witcher"), "lutris")
+    assert index.matches("lutris_1", normalize("STRASSE"))
+    assert index.matches("lutris_1", "")
+    assert not index.matches("lutris_1", normalize("witcher"))
+
+
+def test_query_doesnt_match_across_fields(fake_game):
+    index = SearchIndex()
+    index.update(fake_game("steam_1", name="Portal", developer="Valve"))
+
+    assert not index.matches("steam_1", normalize("portalvalve"))
+    assert not index.matches("steam_1", normalize("portal valve"))
+
+
+def test_update_replaces_the_keys(fake_game):
+    index = SearchIndex()
+    game = fake_game("steam_1", name="Portal")
+    index.update(game)
+
+    game.name = "Half-Life"
+    index.update(game)
+    assert index.matches("steam_1", normalize("half"))
+    assert not index.matches("steam_1", normalize("portal"))
+
+
+def test_unknown_games_dont_match():
+    index = SearchIndex()
+    assert not index.matches("steam_1", normalize("portal"))
+    assert not index.matches("steam_1", "", "steam")
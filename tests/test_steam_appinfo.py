@@ -0,0 +1,146 @@
+# test_steam_appinfo.py
+#
+# Copyright 2024 kramo
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+import struct
+
+import pytest
+
+from cartridges.utils.steam_appinfo import SteamAppInfoHelper, SteamInvalidAppInfoError
+from testing.steam_appinfo import Int64, KeyValuesWriter, app, write_appinfo
+
+
+@pytest.mark.parametrize("version", (27, 28, 29))
+def test_reads_the_wanted_apps(tmp_path, version):
+    path = write_appinfo(
+        tmp_path / "appinfo.vdf",
+        version,
+        {
+            10: app("Game", "Counter-Strike", ("Valve",)),
+            20: app("Tool", "Steamworks", ("Valve",)),
+            30: app("game", "Portal 2", ("Valve", "Another Studio")),
+            40: app("demo", "Unwanted"),
+        },
+    )
+
+    data = SteamAppInfoHelper().get_appinfo_data(path, ("10", "20", "30", "50"))
+
+    assert data == {
+        "10": {"type": "game", "developer": "Valve"},
+        "20": {"type": "tool", "developer": "Valve"},
+        "30": {"type": "game", "developer": "Valve, Another Studio"},
+    }
+
+
+def test_string_table_keys_are_shared(tmp_path):
+    path = write_appinfo(
+        tmp_path / "appinfo.vdf",
+        29,
+        {10: app("game", "One", ("First",)), 20: app("game", "Two", ("Second",))},
+    )
+
+    data = SteamAppInfoHelper().get_appinfo_data(path, ("20",))
+
+    assert data == {"20": {"type": "game", "developer": "Second"}}
+    # Keys are written once, entries only hold indexes
+    assert path.read_bytes().count(b"associations\0") == 1
+
+
+def test_parses_all_value_types():
+    strings = []
+    writer = KeyValuesWriter(strings)
+    data = b"\0" * 4 + writer.write(
+        {
+            "common": {
+                "int": -5,
+                "float": 0.5,
+                "int64": Int64(-(2**40)),
+                "wide": "Ünïcode".encode("utf-16-le"),
+                "empty": {},
+            },
+            "after": "value",
+        }
+    )
+
+    parsed = SteamAppInfoHelper().parse_binary_vdf(data, 4, strings)
+
+    assert parsed == {
+        "common": {
+            "int": -5,
+            "float": 0.5,
+            "int64": -(2**40),
+            "wide": "Ünïcode",
+            "empty": {},
+        },
+        "after": "value",
+    }
+
+
+def test_parses_string_tables():
+    table = struct.pack("<I", 2) + b"appinfo\0common\0trailing"
+    assert SteamAppInfoHelper().parse_string_table(table) == ["appinfo", "common"]
+
+    with pytest.raises(SteamInvalidAppInfoError):
+        SteamAppInfoHelper().parse_string_table(b"\1")
+
+
+def test_developer_falls_back_to_extended(tmp_path):
+    values = app("game", "Old Game")
+    values["appinfo"]["extended"] = {"developer": "Old Studio"}
+    values["appinfo"]["common"]["associations"] = {}
+    path = write_appinfo(tmp_path / "appinfo.vdf", 28, {10: values})
+
+    data = SteamAppInfoHelper().get_appinfo_data(path, ("10",))
+
+    assert data == {"10": {"type": "game", "developer": "Old Studio"}}
+
+
+def test_apps_without_a_type_are_skipped(tmp_path):
+    path = write_appinfo(
+        tmp_path / "appinfo.vdf", 29, {10: {"appinfo": {"common": {"name": "X"}}}}
+    )
+
+    assert not SteamAppInfoHelper().get_appinfo_data(path, ("10",))
+
+
+def test_unknown_versions_are_rejected(tmp_path):
+    path = tmp_path / "appinfo.vdf"
+    path.write_bytes(struct.pack("<II", 0x07564426, 1) + struct.pack("<I", 0))
+
+    with pytest.raises(SteamInvalidAppInfoError):
+        SteamAppInfoHelper().get_appinfo_data(path, ("10",))
+
+
+@pytest.mark.parametrize("version", (27, 28, 29))
+def test_truncated_files_are_rejected(tmp_path, version):
+    path = write_appinfo(
+        tmp_path / "appinfo.vdf", version, {10: app("game", "Truncated", ("Valve",))}
+    )
+    data = path.read_bytes()
+    cut = data.index(b"Truncated")
+    if version >= 29:
+        # Keep the string table but cut the entry short
+        table_offset = struct.unpack_from("<q", data, 8)[0]
+        path.write_bytes(
+            data[:8] + struct.pack("<q", cut) + data[16:cut] + data[table_offset:]
+        )
+    else:
+        path.write_bytes(data[:cut])
+
+    with pytest.raises(SteamInvalidAppInfoError):
+        SteamAppInfoHelper().get_appinfo_data(path, ("10",))
@@ -0,0 +1,110 @@
+# test_store_memory.py
+#
+# Copyright 2024 kramo
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+import gc
+import importlib.util
+import tracemalloc
+import weakref
+from types import SimpleNamespace
+
+import pytest
+
+# The store needs GLib and the shared module generated by the build
+gi = pytest.importorskip("gi")
+if importlib.util.find_spec("cartridges.shared") is None:
+    pytest.skip("cartridges.shared is generated by the build", allow_module_level=True)
+
+gi.require_version("Gtk", "4.0")
+gi.require_version("Adw", "1")
+
+# pylint: disable=wrong-import-position
+from gi.repository import GLib
+
+from cartridges import shared
+from cartridges.game import Game
+from cartridges.store import database
+from cartridges.store.managers.manager import Manager
+from cartridges.store.store import Store
+
+N_GAMES = 200
+N_CYCLES = 10
+PAYLOAD_SIZE = 10_000
+
+
+class DataManager(Manager):
+    """Blocking manager reading the additional data, like the cover manager"""
+
+    uses_additional_data = True
+
+    def main(self, game: Game, additional_data: dict) -> None:
+        assert len(additional_data["payload"]) == PAYLOAD_SIZE
+
+
+@pytest.fixture
+def store(monkeypatch, tmp_path):
+    store = Store()
+    monkeypatch.setattr(shared, "store", store, raising=False)
+    monkeypatch.setattr(shared, "win", SimpleNamespace(toasts={}), raising=False)
+    monkeypatch.setattr(shared, "games_dir", tmp_path / "games", raising=False)
+    monkeypatch.setattr(shared, "covers_dir", tmp_path / "covers", raising=False)
+    monkeypatch.setattr(database, "_database", None)
+    monkeypatch.setattr(database, "_database_resolved", True)
+    store.add_manager(DataManager())
+
+    # Pipelines start synchronously from the owner of the main context
+    context = GLib.MainContext.default()
+    assert context.acquire()
+    yield store
+    context.release()
+
+
+def import_games(store: Store, pipelines: weakref.WeakSet) -> None:
+    # Removed games are replaced on the next import, like after an undone import
+    for game in store.games_without_flag("removed"):
+        game.removed = True
+
+    for index in range(N_GAMES):
+        game = Game({"game_id": f"steam_{index}", "source": "steam", "name": "Game"})
+        pipeline = store.add_game(game, {"payload": bytes(PAYLOAD_SIZE)})
+        assert pipeline is not None
+        pipelines.add(pipeline)
+
+
+def test_import_cycles_release_pipelines(store):
+    pipelines = weakref.WeakSet()
+
+    tracemalloc.start()
+    try:
+        import_games(store, pipelines)
+        import_games(store, pipelines)
+        gc.collect()
+        baseline, _peak = tracemalloc.get_traced_memory()
+
+        for _cycle in range(N_CYCLES):
+            import_games(store, pipelines)
+            assert not store.pipelines
+        gc.collect()
+        current, _peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    assert len(store) == N_GAMES
+    assert not pipelines
+    # Each cycle passes 2 MB of additional data, none of it may be kept
+    assert current - baseline < N_GAMES * PAYLOAD_SIZE / 10